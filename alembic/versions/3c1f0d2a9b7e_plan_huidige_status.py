@@ -0,0 +1,52 @@
+"""plan huidige status
+
+Revision ID: 3c1f0d2a9b7e
+Revises: e110cfe725a6
+Create Date: 2026-10-17 09:12:41.518204
+
+"""
+
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1f0d2a9b7e"
+down_revision: Union[str, None] = "e110cfe725a6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("plannen", sa.Column("status_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "plannen_status_id_fkey",
+        "plannen",
+        "plannen_statussen",
+        ["status_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    op.create_index(
+        op.f("ix_plannen_status_id"), "plannen", ["status_id"], unique=False
+    )
+    op.execute(
+        """
+        UPDATE plannen
+        SET status_id = huidig.id
+        FROM (
+            SELECT DISTINCT ON (plan_id) id, plan_id
+            FROM plannen_statussen
+            ORDER BY plan_id, datum DESC, id DESC
+        ) AS huidig
+        WHERE huidig.plan_id = plannen.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_plannen_status_id"), table_name="plannen")
+    op.drop_constraint("plannen_status_id_fkey", "plannen", type_="foreignkey")
+    op.drop_column("plannen", "status_id")
@@ -1,12 +1,23 @@
+import logging
 import re
+import uuid
+from datetime import datetime
+from datetime import timezone
+from functools import partial
 from io import BytesIO
 from typing import Annotated
+from typing import AsyncIterator
+from typing import Iterator
 from typing import List
 from zipfile import ZipFile
 
+from elasticsearch8 import ConnectionTimeout
+from elasticsearch8 import Elasticsearch
+from elasticsearch8 import NotFoundError
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi import Path
 from fastapi import Query
 from fastapi import Request
 from fastapi import UploadFile
@@ -15,22 +26,43 @@ from minio.error import MinioException
 from oe_utils.search import parse_sort_string
 from oe_utils.search.searchengine import SearchEngine
 from oeauth.openid import OpenIDHelper
+from redis import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import Response
 from starlette.responses import StreamingResponse
 from storageprovider.client import StorageProviderClient
 
+from app.cache.plannen import PlanCache
+from app.cache.search import SearchCache
+from app.cache.search import search_cache_key
+from app.cache.singleflight import SingleFlight
+from app.cache.tiles import TileCache
 from app.constants import settings
+from app.core.db import DbSession
+from app.core.db import run_db
 from app.core.dependencies import get_bestand_or_404
 from app.core.dependencies import get_content_manager
 from app.core.dependencies import get_db
+from app.core.dependencies import get_es_client
+from app.core.dependencies import get_facetten_cache
+from app.core.dependencies import get_plan_cache
 from app.core.dependencies import get_plan_or_404
+from app.core.dependencies import get_redis
 from app.core.dependencies import get_searchengine
-from app.core.dependencies import get_status_or_404
+from app.core.dependencies import get_single_flight
 from app.core.dependencies import get_storage_provider
+from app.core.dependencies import get_tile_cache
+from app.core.dependencies import get_zoek_cache
 from app.core.dependencies import get_token_provider
+from app.core.etag import is_not_modified
+from app.core.etag import make_etag
+from app.core.etag import not_modified_response
+from app.core.responses import ORJSONUTCResponse
+from app.core.responses import orjson_dumps
 from app.mappers.plannen import bestand_db_to_pydantic
-from app.mappers.plannen import plan_db_to_pydantic
+from app.mappers.plannen import plan_db_to_dict
 from app.mappers.plannen import status_db_to_pydantic
 from app.models import Plan
 from app.models import PlanBestand
@@ -39,61 +71,652 @@ from app.schemas import BestandCreate
 from app.schemas import BestandResponse
 from app.schemas import BestandUpdate
 from app.schemas import PlanListResponse
+from app.schemas import PlanListSparseResponse
 from app.schemas import StatusCreate
 from app.schemas import StatusResponse
 from app.schemas.errors import NotFoundResponse
+from app.schemas.facetten import FacetResponse
+from app.schemas.plannen import ClusterResponse
+from app.schemas.plannen import PlanBatchResponse
 from app.schemas.plannen import PlanCreate
 from app.schemas.plannen import PlanResponse
 from app.schemas.plannen import PlanUpdate
+from app.schemas.plannen import SuggestieResponse
+from app.schemas.query import BatchParams
+from app.schemas.query import ClusterParams
+from app.schemas.query import FacettenParams
 from app.schemas.query import FilterParams
+from app.schemas.query import SuggestieParams
+from app.schemas.query import ZoekFilters
+from app.schemas.zoekopdrachten import TrefferResponse
+from app.schemas.zoekopdrachten import ZoekopdrachtCreate
+from app.schemas.zoekopdrachten import ZoekopdrachtResponse
+from app.search import SearchHelper
 from app.search import beheersplan_aggregations
+from app.search import fix_aggregations
+from app.search.count import count_hits
+from app.search.mapping.plannen import INDEX_SORT_FIELD
+from app.search.mapping.plannen import beheersplannen_source
+from app.search.mapping.plannen import clusters_aggregation
 from app.search.mapping.plannen import map_es_beheersplannen_result
+from app.search.mapping.plannen import map_es_beheersplannen_sparse_result
+from app.search.mapping.plannen import map_es_clusters
+from app.search.mapping.plannen import map_es_suggesties
+from app.search.mapping.plannen import suggesties_query
+from app.search.mapping.plannen import uses_index_sort
+from app.search.mapping.zoekopdrachten import zoekopdrachten_index_name
+from app.search.pagination import InvalidCursor
+from app.search.pagination import search_page
 from app.search.query import PlannenQueryBuilder
+from app.search.zoekopdrachten import get_treffers
+from app.search.zoekopdrachten import verwijder_treffers
 from app.services.plannen import PlanService
 from app.storage.conent_manager import ContentManager
 
+log = logging.getLogger(__name__)
+
 router = APIRouter()
 
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+async def _plan_version(
+    db: DbSession, plan_id: int, detail: str | None = None
+) -> str:
+    """
+    Version of a plan and all of its children.
+    Plan.updated_at is bumped whenever the plan or one of its children
+    changes, so it is the only column that has to be read.
+    """
+    version = await run_db(db, PlanService.get_plan_version, plan_id=plan_id)
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=detail or f"Plan with id {plan_id} not found",
+        )
+    return version.isoformat()
+
+
+async def _plan_etag(request: Request, db: DbSession, plan_id: int, *parts) -> str:
+    """Strong ETag for a representation of (a part of) a plan."""
+    version = await _plan_version(db, plan_id)
+    return make_etag(request.base_url, plan_id, version, *parts)
+
+
+def _plan_content(content: dict) -> dict:
+    """
+    A plan built by plan_db_to_dict, ready to be serialized.
+    With TRUSTED_OUTPUT disabled the dict is validated against PlanResponse.
+    """
+    if not settings.TRUSTED_OUTPUT:
+        content = PlanResponse.model_validate(content).model_dump(mode="json")
+    return content
+
+
+def _plan_response(
+    content: dict, status_code: int = status.HTTP_200_OK, headers: dict | None = None
+) -> ORJSONUTCResponse:
+    """
+    Serialize a plan built by plan_db_to_dict.
+    Returning the response ourselves skips FastAPI's response_model validation.
+    """
+    return ORJSONUTCResponse(
+        content=_plan_content(content), status_code=status_code, headers=headers
+    )
+
+
+def _plannen_content(plannen: list[dict], velden: list[str] | None) -> list[dict]:
+    """
+    Plannen mapped from ES hits, ready to be serialized.
+    With TRUSTED_OUTPUT disabled they are validated against PlanListResponse,
+    or PlanListSparseResponse with velden=.
+    """
+    if settings.TRUSTED_OUTPUT:
+        return plannen
+    if velden:
+        return [
+            PlanListSparseResponse.model_validate(plan).model_dump(
+                mode="json", by_alias=True, exclude_unset=True
+            )
+            for plan in plannen
+        ]
+    return [
+        PlanListResponse.model_validate(plan).model_dump(mode="json", by_alias=True)
+        for plan in plannen
+    ]
+
+
+def _count_headers(es_client: Elasticsearch, query_params: dict) -> dict[str, str]:
+    """Count the plannen matching the filters, capped at TRACK_TOTAL_HITS."""
+    total, relation = count_hits(
+        es_client,
+        settings.ELASTICSEARCH_INDEX,
+        query=PlannenQueryBuilder()(query_params, settings),
+        track_total_hits=settings.ELASTICSEARCH_TRACK_TOTAL_HITS,
+    )
+    return {"X-Total-Count": str(total), "X-Total-Count-Relation": relation}
+
+
+def _search_index_sorted(
+    es_client: Elasticsearch, query_params: dict, source: list | dict
+) -> dict:
+    """
+    Search a page in the order of the index sort, without counting the total.
+    ES can then stop collecting on every segment once the page is full.
+    """
+    size = query_params.get("per_pagina", 10)
+    return es_client.search(
+        index=settings.ELASTICSEARCH_INDEX,
+        query=PlannenQueryBuilder()(query_params, settings),
+        sort=[{INDEX_SORT_FIELD: {"order": "asc"}}],
+        from_=(query_params.get("pagina", 1) - 1) * size,
+        size=size,
+        source=source,
+        track_total_hits=False,
+    )
+
+
+def _get_zoekopdracht_document(es_client: Elasticsearch, zoekopdracht_id: str) -> dict:
+    try:
+        return es_client.get(
+            index=zoekopdrachten_index_name(settings.ELASTICSEARCH_INDEX),
+            id=zoekopdracht_id,
+            source_excludes=["query"],
+        )["_source"]
+    except NotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Zoekopdracht not found"
+        )
+
+
+def _zoekopdracht_content(request: Request, zoekopdracht_id: str, document: dict):
+    self_url = request.url_for("get_zoekopdracht", zoekopdracht_id=zoekopdracht_id)
+    return {
+        "id": zoekopdracht_id,
+        "naam": document["naam"],
+        "filters": document["filters"],
+        "aangemaakt": document["aangemaakt"],
+        "self": str(self_url),
+        "treffers": str(
+            request.url_for(
+                "get_zoekopdracht_treffers", zoekopdracht_id=zoekopdracht_id
+            )
+        ),
+    }
+
+
+def _ndjson_lines(plannen: list[Plan], request: Request) -> bytes:
+    return b"".join(
+        orjson_dumps(_plan_content(plan_db_to_dict(plan, request))) + b"\n"
+        for plan in plannen
+    )
+
+
+def _export_plannen(db: Session, request: Request) -> Iterator[bytes]:
+    for partition in PlanService.iter_plannen(
+        db=db, batch_size=settings.EXPORT_BATCH_SIZE
+    ):
+        yield _ndjson_lines(partition, request)
+
+
+async def _aexport_plannen(db: AsyncSession, request: Request) -> AsyncIterator[bytes]:
+    async for partition in PlanService.aiter_plannen(
+        db=db, batch_size=settings.EXPORT_BATCH_SIZE
+    ):
+        yield _ndjson_lines(partition, request)
+
 
 @router.post("/", response_model=PlanResponse, status_code=status.HTTP_201_CREATED)
-def create_plan(request: Request, plan: PlanCreate, db: Session = Depends(get_db)):
+async def create_plan(
+        request: Request, plan: PlanCreate, db: DbSession = Depends(get_db)
+):
     """Create a new plan."""
-    db_plan = PlanService.create_plan(request=request, db=db, plan=plan)
-    return plan_db_to_pydantic(db_plan, request)
+    db_plan = await run_db(db, PlanService.create_plan, request=request, plan=plan)
+    return _plan_response(
+        plan_db_to_dict(db_plan, request), status_code=status.HTTP_201_CREATED
+    )
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "All plannen, one PlanResponse JSON document per line.",
+            "content": {"application/x-ndjson": {}},
+        },
+    },
+)
+async def export_plannen(request: Request, db: DbSession = Depends(get_db)):
+    """
+    Export all plannen as newline delimited JSON.
+    Plans are read in batches over a server-side cursor and written as they
+    come in, so the first bytes go out right away and memory stays flat.
+    """
+    if isinstance(db, AsyncSession):
+        lines = _aexport_plannen(db, request)
+    else:
+        # Starlette iterates a sync generator in the threadpool
+        lines = _export_plannen(db, request)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@router.get("/batch", response_model=PlanBatchResponse)
+async def get_plannen_batch(
+        params: Annotated[BatchParams, Query()],
+        request: Request,
+        db: DbSession = Depends(get_db),
+):
+    """
+    Get several plannen by id in one request, e.g. ?ids=1,2,3.
+    Ids without a plan are listed in niet_gevonden.
+    """
+    db_plannen = await run_db(db, PlanService.get_plannen_by_ids, plan_ids=params.ids)
+    by_id = {db_plan.id: db_plan for db_plan in db_plannen}
+    return ORJSONUTCResponse(
+        content={
+            "plannen": [
+                _plan_content(plan_db_to_dict(by_id[plan_id], request))
+                for plan_id in params.ids
+                if plan_id in by_id
+            ],
+            "niet_gevonden": [
+                plan_id for plan_id in params.ids if plan_id not in by_id
+            ],
+        }
+    )
+
+
+@router.get(
+    "/tiles/{z}/{x}/{y}.mvt",
+    response_class=Response,
+    responses={200: {"content": {MVT_MEDIA_TYPE: {}}}},
+)
+async def get_tile(
+        z: Annotated[int, Path(ge=0, le=22)],
+        x: Annotated[int, Path(ge=0)],
+        y: Annotated[int, Path(ge=0)],
+        db: DbSession = Depends(get_db),
+        tile_cache: TileCache = Depends(get_tile_cache),
+):
+    """
+    Get the plan geometries in web mercator tile z/x/y as a Mapbox vector tile,
+    in layer "plannen" with id, onderwerp and status attributes.
+    """
+    if x >= 2**z or y >= 2**z:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tile {z}/{x}/{y} bestaat niet",
+        )
+    tile = await run_in_threadpool(tile_cache.get, z, x, y)
+    if tile is None:
+        generation = await run_in_threadpool(tile_cache.generation)
+        tile, plan_ids = await run_db(db, PlanService.get_tile, z=z, x=x, y=y)
+        await run_in_threadpool(tile_cache.set, z, x, y, tile, plan_ids, generation)
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE)
+
+
+@router.get("/clusters", response_model=List[ClusterResponse])
+def get_clusters(
+        query_params: Annotated[ClusterParams, Query()],
+        es_client: Elasticsearch = Depends(get_es_client),
+        zoek_cache: SearchCache = Depends(get_zoek_cache),
+):
+    """
+    Get the plannen matching the filters clustered per geotile cell,
+    with the number of plannen and their centroid per cell.
+    Takes the same filters as the list, e.g. ?precisie=8&bbox=...
+    Results are cached until the next change to the index.
+    """
+    query_params = {k: v for k, v in dict(query_params).items() if v is not None}
+    precisie = query_params.pop("precisie")
+    cache_params = {**query_params, "clusters": precisie}
+    generation = zoek_cache.generation()
+    clusters = zoek_cache.get(generation, cache_params)
+    if clusters is None:
+        result = es_client.search(
+            index=settings.ELASTICSEARCH_INDEX,
+            query=PlannenQueryBuilder()(query_params, settings),
+            aggregations=clusters_aggregation(precisie),
+            size=0,
+            track_total_hits=False,
+        )
+        clusters = map_es_clusters(result)
+        zoek_cache.set(generation, cache_params, clusters)
+    return ORJSONUTCResponse(content=clusters)
+
+
+@router.get("/suggesties", response_model=List[SuggestieResponse])
+def get_suggesties(
+        params: Annotated[SuggestieParams, Query()],
+        request: Request,
+        es_client: Elasticsearch = Depends(get_es_client),
+):
+    """
+    Type-ahead suggestions on onderwerp, e.g. ?q=abdij ge.
+    Only ids and onderwerpen are returned; when ES can't answer within
+    SUGGESTIES_TIMEOUT no suggestions are returned.
+    """
+    try:
+        result = es_client.options(request_timeout=settings.SUGGESTIES_TIMEOUT).search(
+            index=settings.ELASTICSEARCH_INDEX,
+            query=suggesties_query(params.q),
+            sort=["_score", "onderwerp.raw"],
+            size=params.aantal,
+            source=["id", "onderwerp"],
+            track_total_hits=False,
+            timeout=f"{int(settings.SUGGESTIES_TIMEOUT * 1000)}ms",
+        )
+    except ConnectionTimeout:
+        log.warning("Suggesties voor %r duurden te lang.", params.q)
+        return ORJSONUTCResponse(content=[])
+    self_url = request.url_for("get_plan", plan_id="{id}")
+    return ORJSONUTCResponse(content=map_es_suggesties(self_url, result))
+
+
+@router.get("/facetten", response_model=List[FacetResponse])
+def get_facetten(
+        query_params: Annotated[FacettenParams, Query()],
+        request: Request,
+        es_client: Elasticsearch = Depends(get_es_client),
+        facetten_cache: SearchCache = Depends(get_facetten_cache),
+):
+    """
+    Get the facetten of the plannen matching the filters, e.g. ?gemeente=Gent.
+    Only the facetten= requested are computed, all of them by default.
+    Results are cached until the next change to the index.
+    """
+    query_params = {k: v for k, v in dict(query_params).items() if v is not None}
+    namen = query_params.pop("facetten", None) or list(beheersplan_aggregations)
+    cache_params = {**query_params, "facetten": namen}
+    generation = facetten_cache.generation()
+    facetten = facetten_cache.get(generation, cache_params)
+    if facetten is None:
+        result = es_client.search(
+            index=settings.ELASTICSEARCH_INDEX,
+            query=PlannenQueryBuilder()(query_params, settings),
+            aggregations={naam: beheersplan_aggregations[naam] for naam in namen},
+            size=0,
+            track_total_hits=False,
+        )
+        aggregations = fix_aggregations(result.get("aggregations", {}))
+        facetten = SearchHelper(request).get_facetten(aggregations)
+        facetten_cache.set(generation, cache_params, facetten)
+    return ORJSONUTCResponse(content=facetten)
+
+
+@router.post(
+    "/zoekopdrachten",
+    response_model=ZoekopdrachtResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_zoekopdracht(
+        zoekopdracht: ZoekopdrachtCreate,
+        request: Request,
+        es_client: Elasticsearch = Depends(get_es_client),
+):
+    """
+    Save the filters of a search to be notified of new or changed plannen
+    matching them, instead of polling the list.
+    Every indexed plan is percolated against the saved searches; the matches
+    are listed under treffers.
+    Relative filters such as beheersplan_verlopen are fixed on saving.
+    """
+    query_params = {
+        k: v for k, v in dict(zoekopdracht.filters).items() if v is not None
+    }
+    document = {
+        "naam": zoekopdracht.naam,
+        "filters": zoekopdracht.filters.model_dump(mode="json", exclude_none=True),
+        "query": PlannenQueryBuilder()(query_params, settings),
+        "aangemaakt": datetime.now(tz=timezone.utc).isoformat(),
+    }
+    zoekopdracht_id = uuid.uuid4().hex
+    es_client.index(
+        index=zoekopdrachten_index_name(settings.ELASTICSEARCH_INDEX),
+        id=zoekopdracht_id,
+        document=document,
+        refresh="wait_for",
+    )
+    return ORJSONUTCResponse(
+        content=_zoekopdracht_content(request, zoekopdracht_id, document),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+@router.get(
+    "/zoekopdrachten/{zoekopdracht_id}",
+    response_model=ZoekopdrachtResponse,
+    responses={404: {"model": NotFoundResponse}},
+)
+def get_zoekopdracht(
+        zoekopdracht_id: str,
+        request: Request,
+        es_client: Elasticsearch = Depends(get_es_client),
+):
+    document = _get_zoekopdracht_document(es_client, zoekopdracht_id)
+    return ORJSONUTCResponse(
+        content=_zoekopdracht_content(request, zoekopdracht_id, document)
+    )
+
+
+@router.delete(
+    "/zoekopdrachten/{zoekopdracht_id}", status_code=status.HTTP_204_NO_CONTENT
+)
+def delete_zoekopdracht(
+        zoekopdracht_id: str,
+        es_client: Elasticsearch = Depends(get_es_client),
+        redis: Redis = Depends(get_redis),
+):
+    try:
+        es_client.delete(
+            index=zoekopdrachten_index_name(settings.ELASTICSEARCH_INDEX),
+            id=zoekopdracht_id,
+            refresh="wait_for",
+        )
+    except NotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Zoekopdracht not found"
+        )
+    verwijder_treffers(redis, zoekopdracht_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get(
+    "/zoekopdrachten/{zoekopdracht_id}/treffers",
+    response_model=List[TrefferResponse],
+    responses={404: {"model": NotFoundResponse}},
+)
+def get_zoekopdracht_treffers(
+        zoekopdracht_id: str,
+        request: Request,
+        sinds: datetime | None = Query(
+            None, description="Enkel treffers vanaf dit tijdstip."
+        ),
+        es_client: Elasticsearch = Depends(get_es_client),
+        redis: Redis = Depends(get_redis),
+):
+    """
+    Get the plannen that matched a saved search when they were indexed,
+    oldest first. Poll with sinds= set to the tijdstip of the last treffer.
+    """
+    _get_zoekopdracht_document(es_client, zoekopdracht_id)
+    self_url = request.url_for("get_plan", plan_id="{id}")
+    treffers = get_treffers(
+        redis, zoekopdracht_id, sinds.timestamp() if sinds is not None else None
+    )
+    return ORJSONUTCResponse(
+        content=[
+            {
+                "id": plan_id,
+                "self": str(self_url).format(id=plan_id),
+                "tijdstip": datetime.fromtimestamp(tijdstip, tz=timezone.utc),
+            }
+            for plan_id, tijdstip in treffers
+        ]
+    )
 
 
 @router.get("/{plan_id}", response_model=PlanResponse)
-def get_plan(request: Request, plan_id: int, db: Session = Depends(get_db)):
+async def get_plan(
+        request: Request,
+        plan_id: int,
+        db: DbSession = Depends(get_db),
+        plan_cache: PlanCache = Depends(get_plan_cache),
+):
     """Get plan by ID."""
-    db_plan = PlanService.get_plan(db=db, plan_id=plan_id)
+    self_url = str(request.url_for("get_plan", plan_id=plan_id))
+    # The cache makes blocking Redis calls
+    cached = await run_in_threadpool(plan_cache.get, plan_id)
+    if cached is not None:
+        etag = make_etag(request.base_url, plan_id, cached["versie"])
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        return _plan_response(
+            {**cached["plan"], "self": self_url}, headers={"ETag": etag}
+        )
+
+    # Read before the plan, so a commit in between keeps it out of the cache
+    generation = await run_in_threadpool(plan_cache.generation, plan_id)
+    version = await _plan_version(db, plan_id, detail="Plan not found")
+    etag = make_etag(request.base_url, plan_id, version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    db_plan = await run_db(db, PlanService.get_plan, plan_id=plan_id)
     if not db_plan:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found"
         )
-    return plan_db_to_pydantic(db_plan, request)
+    plan = plan_db_to_dict(db_plan, request)
+    await run_in_threadpool(
+        plan_cache.set, plan_id, {"versie": version, "plan": plan}, generation
+    )
+    return _plan_response(plan, headers={"ETag": etag})
 
 
-@router.get("/", response_model=List[PlanListResponse])
+@router.get(
+    "/",
+    response_model=List[PlanListResponse],
+    responses={
+        200: {
+            "model": List[PlanListSparseResponse],
+            "description": "Plannen; with velden= only those velden are returned.",
+        },
+    },
+)
 def get_plannen(
         query_params: Annotated[FilterParams, Query()],
         request: Request,
         search_engine: SearchEngine = Depends(get_searchengine),
+        es_client: Elasticsearch = Depends(get_es_client),
+        zoek_cache: SearchCache = Depends(get_zoek_cache),
+        single_flight: SingleFlight = Depends(get_single_flight),
 ):
-    """Get list of plannen."""
+    """
+    Get list of plannen.
+    Pages are cached per filters, sort and page until the index changes,
+    and concurrent identical searches share one call to ES.
+    With cursor=* the list is paged with search_after on a point in time
+    instead of pagina; the next page is in the Link header.
+    With velden= only those velden are fetched from ES and returned.
+    geometrie_detail= picks a simplified geometrie for map overviews.
+    With alleen_aantal=true only the number of plannen is returned.
+    The mapped hits are serialized without revalidation, see TRUSTED_OUTPUT.
+    """
     query_params = {k: v for k, v in dict(query_params).items() if v is not None}
+    if query_params.pop("alleen_aantal", False):
+        headers = _count_headers(es_client, query_params)
+        return ORJSONUTCResponse(
+            content={
+                "aantal": int(headers["X-Total-Count"]),
+                "relatie": headers["X-Total-Count-Relation"],
+            },
+            headers=headers,
+        )
+    cursor = query_params.pop("cursor", None)
+    velden = query_params.pop("velden", None)
+    geometrie_detail = query_params.pop("geometrie_detail", None)
     sort = parse_sort_string(query_params.get("sort", "onderwerp.raw"))
     self_url = request.url_for("get_plan", plan_id="{id}")
-    beheersplannen_dto = search_engine.query(
-        query_params=query_params,
-        sort=sort,
-        settings=settings,
-        aggregations=beheersplan_aggregations,
-        load_searchquery_param_func=PlannenQueryBuilder(),
-        mapper=map_es_beheersplannen_result,
-        mapper_args=[self_url],
-    )
+    source = beheersplannen_source(velden, geometrie_detail)
+    if velden:
+        mapper = map_es_beheersplannen_sparse_result
+        mapper_args = [self_url, velden]
+    else:
+        mapper = map_es_beheersplannen_result
+        mapper_args = [self_url]
+    mapper = partial(mapper, geometrie_detail=geometrie_detail)
+
+    headers = {}
+    if cursor is not None:
+        if "pagina" in query_params:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="cursor en pagina kunnen niet samen gebruikt worden",
+            )
+        try:
+            result, next_cursor = search_page(
+                es_client,
+                settings.ELASTICSEARCH_INDEX,
+                query=PlannenQueryBuilder()(query_params, settings),
+                sort=sort,
+                size=query_params.get("per_pagina", 10),
+                cursor=cursor,
+                keep_alive=settings.ELASTICSEARCH_PIT_KEEP_ALIVE,
+                source=source,
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if next_cursor is not None:
+            next_url = request.url.include_query_params(cursor=next_cursor)
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        plannen = mapper(*mapper_args, result, settings)
+    else:
+        cache_params = {
+            **query_params,
+            "velden": velden,
+            "geometrie_detail": geometrie_detail,
+            "self": str(self_url),
+        }
+        generation = zoek_cache.generation()
+        plannen = zoek_cache.get(generation, cache_params)
+        if plannen is None:
+
+            def search():
+                if uses_index_sort(query_params.get("sort")):
+                    result = _search_index_sorted(es_client, query_params, source)
+                    return mapper(*mapper_args, result, settings)
+                return search_engine.query(
+                    query_params=query_params,
+                    sort=sort,
+                    settings=settings,
+                    load_searchquery_param_func=PlannenQueryBuilder(),
+                    mapper=mapper,
+                    mapper_args=mapper_args,
+                    source=source,
+                ).data
+
+            plannen = single_flight.do(
+                f"{generation}:{search_cache_key(cache_params)}", search
+            )
+            zoek_cache.set(generation, cache_params, plannen)
 
-    return beheersplannen_dto.data
+    # Returning the response ourselves skips FastAPI's response_model validation
+    return ORJSONUTCResponse(content=_plannen_content(plannen, velden), headers=headers)
+
+
+@router.head("/")
+def count_plannen(
+        query_params: Annotated[ZoekFilters, Query()],
+        es_client: Elasticsearch = Depends(get_es_client),
+):
+    """
+    Count the plannen matching the filters, without fetching them.
+    The count is in X-Total-Count; X-Total-Count-Relation is "gte"
+    when counting stopped at ELASTICSEARCH_TRACK_TOTAL_HITS.
+    """
+    query_params = {k: v for k, v in dict(query_params).items() if v is not None}
+    return Response(headers=_count_headers(es_client, query_params))
 
 
 @router.put(
@@ -104,21 +727,21 @@ def get_plannen(
         "404": {"model": NotFoundResponse, "description": "Plan not found"},
     },
 )
-def update_plan(
+async def update_plan(
         request: Request,
         plan: PlanUpdate,
         existing: Plan = Depends(get_plan_or_404),
-        db: Session = Depends(get_db),
+        db: DbSession = Depends(get_db),
 ):
     """Update an existing plan."""
-    db_plan = PlanService.update_plan(db=db, existing=existing, plan=plan)
-    return plan_db_to_pydantic(db_plan, request)
+    db_plan = await run_db(db, PlanService.update_plan, existing=existing, plan=plan)
+    return _plan_response(plan_db_to_dict(db_plan, request))
 
 
 @router.delete("/{plan_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_plan(plan_id: int, db: Session = Depends(get_db)):
+async def delete_plan(plan_id: int, db: DbSession = Depends(get_db)):
     """Delete a plan."""
-    success = PlanService.delete_plan(db=db, plan_id=plan_id)
+    success = await run_db(db, PlanService.delete_plan, plan_id=plan_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found"
@@ -137,22 +760,25 @@ def upload_to_temp(
 
 
 @router.post("/{plan_id}/bestanden", response_model=BestandResponse)
-def add_bestand(
+async def add_bestand(
         plan_id: int,
         request: dict,  # Accept raw dict first
-        db: Session = Depends(get_db),
+        db: DbSession = Depends(get_db),
         content_manager: ContentManager = Depends(get_content_manager),
         storageprovider: StorageProviderClient = Depends(get_storage_provider),
 ):
-    # Validate with context
-    bestand_pydantic = BestandCreate.model_validate(
+    # Validate with context, the validators talk to the storage provider
+    bestand_pydantic = await run_in_threadpool(
+        BestandCreate.model_validate,
         request,
         context={
             "content_manager": content_manager,
             "storageprovider": storageprovider,
         },
     )
-    bestand = PlanService.add_bestand(db, plan_id, bestand_pydantic)
+    bestand = await run_db(
+        db, PlanService.add_bestand, plan_id=plan_id, bestand=bestand_pydantic
+    )
     return bestand_db_to_pydantic(bestand)
 
 
@@ -210,22 +836,31 @@ def get_bestand(
         "404": {"model": NotFoundResponse, "description": "Plan not found"},
     },
 )
-def get_bestanden(
+async def get_bestanden(
         request: Request,
+        response: Response,
         object_id: int,
-        plan: Plan = Depends(get_plan_or_404),
+        db: DbSession = Depends(get_db),
         storage_provider: StorageProviderClient = Depends(get_storage_provider),
         _token_provider: OpenIDHelper = Depends(get_token_provider),
 ):
     """Get list of bestanden for a plan."""
     accept = request.headers.get("accept", "application/json")
     if "application/json" in accept:
-        return [bestand_db_to_pydantic(bestand) for bestand in plan.bestanden]
+        etag = await _plan_etag(request, db, object_id, "bestanden")
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        bestanden = await run_db(db, PlanService.get_bestanden, plan_id=object_id)
+        response.headers["ETag"] = etag
+        return [bestand_db_to_pydantic(bestand) for bestand in bestanden]
     elif "application/zip" in accept:
+        bestanden = await run_db(db, PlanService.get_bestanden, plan_id=object_id)
         translations = {
-            str(bestand.id).zfill(3): bestand.naam for bestand in plan.bestanden
+            str(bestand.id).zfill(3): bestand.naam for bestand in bestanden
         }
         if not translations:
+            # No ETag on this path: only an empty plan needs its existence checked
+            await _plan_version(db, object_id)
             # create an empty zip file
             zip_data = BytesIO()
             with ZipFile(zip_data, "w"):
@@ -233,9 +868,11 @@ def get_bestanden(
             zip_data.seek(0)
             zip_data = zip_data.read()
         else:
-            zip_data = storage_provider.get_container_data(
+            system_token = await run_in_threadpool(_token_provider.get_system_token)
+            zip_data = await run_in_threadpool(
+                storage_provider.get_container_data,
                 str(object_id),
-                system_token=_token_provider.get_system_token(),
+                system_token=system_token,
                 translations=translations,
             )
         return Response(
@@ -259,24 +896,27 @@ def get_bestanden(
         "404": {"model": NotFoundResponse, "description": "Plan not found"},
     },
 )
-def update_bestand(
+async def update_bestand(
         request: Request,
         bestand: BestandUpdate,
         existing: PlanBestand = Depends(get_bestand_or_404),
-        db: Session = Depends(get_db),
+        db: DbSession = Depends(get_db),
 ):
     """Update an existing plan."""
-    db_plan = PlanService.update_bestand(db=db, existing=existing, bestand_data=bestand)
+    db_plan = await run_db(
+        db, PlanService.update_bestand, existing=existing, bestand_data=bestand
+    )
     return bestand_db_to_pydantic(db_plan, request)
 
 
 @router.delete(
     "/{plan_id}/bestanden/{object_id}", status_code=status.HTTP_204_NO_CONTENT
 )
-def delete_betand(
-        existing: PlanBestand = Depends(get_bestand_or_404), db: Session = Depends(get_db)
+async def delete_betand(
+        existing: PlanBestand = Depends(get_bestand_or_404),
+        db: DbSession = Depends(get_db),
 ):
-    PlanService.delete_bestand(db=db, db_bestand=existing)
+    await run_db(db, PlanService.delete_bestand, db_bestand=existing)
 
 
 @router.post(
@@ -284,14 +924,16 @@ def delete_betand(
     response_model=StatusResponse,
     status_code=status.HTTP_201_CREATED,
 )
-def create_status(
+async def create_status(
         request: Request,
         object_id: int,
         status: StatusCreate,
-        db: Session = Depends(get_db)
+        db: DbSession = Depends(get_db)
 ):
     """Create a new plan."""
-    db_plan = PlanService.add_status(db=db, plan_id=object_id, status=status)
+    db_plan = await run_db(
+        db, PlanService.add_status, plan_id=object_id, status=status
+    )
     return status_db_to_pydantic(db_plan, request)
 
 
@@ -306,11 +948,19 @@ def create_status(
         404: {"model": NotFoundResponse, "description": "Plan not found"},
     },
 )
-def get_statussen(
-        plan: Plan = Depends(get_plan_or_404),
+async def get_statussen(
+        request: Request,
+        response: Response,
+        object_id: int,
+        db: DbSession = Depends(get_db),
 ):
-    """Get list of bestanden for a plan."""
-    return [status_db_to_pydantic(status) for status in plan.statussen]
+    """Get list of statussen for a plan."""
+    etag = await _plan_etag(request, db, object_id, "statussen")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    statussen = await run_db(db, PlanService.get_statussen, plan_id=object_id)
+    response.headers["ETag"] = etag
+    return [status_db_to_pydantic(status) for status in statussen]
 
 
 @router.get(
@@ -321,8 +971,30 @@ def get_statussen(
         404: {"model": NotFoundResponse, "description": "Status not found"},
     },
 )
-def get_status(
-        status: PlanStatus = Depends(get_status_or_404),
+async def get_status(
+        request: Request,
+        response: Response,
+        plan_id: int,
+        object_id: int,
+        db: DbSession = Depends(get_db),
 ):
-    """ """
-    return status_db_to_pydantic(status)
+    """Get a single status of a plan."""
+    # Checked before the ETag: a foreign status must not get a 304
+    if not await run_db(
+        db, PlanService.has_status, plan_id=plan_id, status_id=object_id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"PlanStatus with id {object_id} not found",
+        )
+    etag = await _plan_etag(request, db, plan_id, "status", object_id)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    db_status = await run_db(db, lambda db: db.get(PlanStatus, object_id))
+    if db_status is None or db_status.plan_id != plan_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"PlanStatus with id {object_id} not found",
+        )
+    response.headers["ETag"] = etag
+    return status_db_to_pydantic(db_status)
@@ -0,0 +1,182 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any
+from typing import Iterable
+
+import orjson
+from redis import Redis
+from redis.exceptions import RedisError
+
+from app.core.responses import orjson_dumps
+
+log = logging.getLogger(__name__)
+
+# Stores the entry only when the plan was not invalidated since the generation
+# was read: KEYS generation key, entry key; ARGV generation, entry, ttl
+_SET_IF_GENERATION = """
+if (redis.call('GET', KEYS[1]) or '0') == ARGV[1] then
+    redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# (local invalidation counter, Redis generation of the plan)
+Generation = tuple[int, str | None]
+
+
+class PlanCache:
+    """
+    Two-tier cache for rendered plan details.
+
+    A bounded LRU in every worker sits in front of a Redis layer that is
+    shared by all workers. Invalidations delete the Redis entries and are
+    published on a channel, so every worker also drops its local copy.
+
+    Read the generation of a plan before loading it and pass it to set: an
+    invalidation in between bumps the generation, and the entry, rendered
+    from the old plan, is then not stored.
+    """
+
+    def __init__(
+        self,
+        redis: Redis | None,
+        max_size: int = 1000,
+        ttl: int = 3600,
+        prefix: str = "plannen:detail",
+        channel: str = "plannen:detail:invalidate",
+    ):
+        self.redis = redis
+        self.max_size = max_size
+        self.ttl = ttl
+        self.prefix = prefix
+        self.channel = channel
+        self._local: OrderedDict[int, dict[str, Any]] = OrderedDict()
+        self._invalidations = 0
+        self._lock = threading.Lock()
+        self._listener = None
+        self._set_if_generation = (
+            redis.register_script(_SET_IF_GENERATION) if redis is not None else None
+        )
+
+    def _key(self, plan_id: int) -> str:
+        return f"{self.prefix}:{plan_id}"
+
+    def _generation_key(self, plan_id: int) -> str:
+        return f"{self.prefix}:{plan_id}:generatie"
+
+    def generation(self, plan_id: int) -> Generation:
+        with self._lock:
+            local = self._invalidations
+        if self.redis is None:
+            return local, None
+        try:
+            return local, self.redis.get(self._generation_key(plan_id)) or "0"
+        except RedisError:
+            log.warning("Generatie van plan %s kon niet gelezen worden.", plan_id)
+            return local, None
+
+    def get(self, plan_id: int) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._local.get(plan_id)
+            if entry is not None:
+                self._local.move_to_end(plan_id)
+                return entry
+            local = self._invalidations
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(self._key(plan_id))
+        except RedisError:
+            log.warning("Plan %s kon niet uit de Redis cache gelezen worden.", plan_id)
+            return None
+        if raw is None:
+            return None
+        entry = orjson.loads(raw)
+        self._remember(plan_id, entry, local)
+        return entry
+
+    def set(
+        self, plan_id: int, entry: dict[str, Any], generation: Generation | None = None
+    ) -> None:
+        """
+        Store an entry, unless the plan was invalidated since generation.
+        Without a generation the entry is stored unconditionally.
+        """
+        local, remote = generation if generation is not None else (None, None)
+        if not self._remember(plan_id, entry, local):
+            return
+        if self.redis is None:
+            return
+        try:
+            if generation is None:
+                self.redis.set(self._key(plan_id), orjson_dumps(entry), ex=self.ttl)
+            elif remote is not None:
+                self._set_if_generation(
+                    keys=[self._generation_key(plan_id), self._key(plan_id)],
+                    args=[remote, orjson_dumps(entry), self.ttl],
+                )
+        except RedisError:
+            log.warning("Plan %s kon niet in de Redis cache bewaard worden.", plan_id)
+
+    def invalidate(self, plan_ids: Iterable[int]) -> None:
+        """Evict plans everywhere: locally, in Redis and in the other workers."""
+        plan_ids = list(plan_ids)
+        if not plan_ids:
+            return
+        self._forget(plan_ids)
+        if self.redis is None:
+            return
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                for plan_id in plan_ids:
+                    pipe.incr(self._generation_key(plan_id))
+                    pipe.expire(self._generation_key(plan_id), self.ttl)
+                pipe.delete(*(self._key(plan_id) for plan_id in plan_ids))
+                pipe.publish(self.channel, orjson.dumps(plan_ids))
+                pipe.execute()
+        except RedisError:
+            log.exception(
+                "Plannen %s konden niet uit de cache verwijderd worden.", plan_ids
+            )
+
+    def start_listener(self) -> None:
+        """Listen for invalidations published by other workers."""
+        if self.redis is None or self._listener is not None:
+            return
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: self._handle_message})
+        self._listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def stop_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def _handle_message(self, message: dict[str, Any]) -> None:
+        self._forget(orjson.loads(message["data"]))
+
+    def _remember(
+        self, plan_id: int, entry: dict[str, Any], local: int | None = None
+    ) -> bool:
+        """
+        Keep an entry locally, unless a plan was invalidated since the local
+        invalidation counter was read. Returns whether it was still current.
+        """
+        with self._lock:
+            if local is not None and local != self._invalidations:
+                return False
+            if self.max_size <= 0:
+                return True
+            self._local[plan_id] = entry
+            self._local.move_to_end(plan_id)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+        return True
+
+    def _forget(self, plan_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._invalidations += 1
+            for plan_id in plan_ids:
+                self._local.pop(plan_id, None)
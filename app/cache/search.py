@@ -0,0 +1,95 @@
+import hashlib
+import logging
+from typing import Any
+from typing import Mapping
+
+import orjson
+from redis import Redis
+from redis.exceptions import RedisError
+
+log = logging.getLogger(__name__)
+
+# Bumped after every change to the plannen index; cached search results
+# are keyed on it, so they expire on the next index change.
+INDEX_GENERATIE_KEY = "plannen:index:generatie"
+
+
+def get_index_generation(redis: Redis) -> int:
+    return int(redis.get(INDEX_GENERATIE_KEY) or 0)
+
+
+def bump_index_generation(redis: Redis) -> int:
+    return redis.incr(INDEX_GENERATIE_KEY)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, (list, tuple, set)):
+        return sorted((_normalize(item) for item in value), key=str)
+    return value
+
+
+def search_cache_key(params: Mapping[str, Any]) -> str:
+    """
+    Digest of the search parameters, independent of their order.
+    Empty parameters are dropped, so ?gemeente= and no gemeente hit the same key.
+    """
+    normalized = {
+        key: _normalize(value)
+        for key, value in params.items()
+        if value is not None and value != ""
+    }
+    payload = orjson.dumps(normalized, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.sha1(payload).hexdigest()
+
+
+class SearchCache:
+    """
+    Redis cache for search results that only change when the index changes.
+
+    Entries are stored under the current index generation and expire
+    after ttl as a safety net; a new generation makes them unreachable.
+    """
+
+    def __init__(self, redis: Redis | None, namespace: str, ttl: int = 86400):
+        self.redis = redis
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _key(self, generation: int, params: Mapping[str, Any]) -> str:
+        return f"plannen:{self.namespace}:{generation}:{search_cache_key(params)}"
+
+    def generation(self) -> int | None:
+        """Current index generation, None when Redis can't be reached."""
+        if self.redis is None:
+            return None
+        try:
+            return get_index_generation(self.redis)
+        except RedisError:
+            log.warning("De index generatie kon niet uit Redis gelezen worden.")
+            return None
+
+    def get(self, generation: int | None, params: Mapping[str, Any]) -> Any | None:
+        if generation is None:
+            return None
+        try:
+            raw = self.redis.get(self._key(generation, params))
+        except RedisError:
+            log.warning("Zoekresultaat kon niet uit de Redis cache gelezen worden.")
+            return None
+        return None if raw is None else orjson.loads(raw)
+
+    def set(
+        self, generation: int | None, params: Mapping[str, Any], value: Any
+    ) -> None:
+        """
+        Store a result under the generation read before it was computed,
+        so a result that raced an index change is never served as current.
+        """
+        if generation is None:
+            return
+        try:
+            self.redis.set(
+                self._key(generation, params), orjson.dumps(value), ex=self.ttl
+            )
+        except RedisError:
+            log.warning("Zoekresultaat kon niet in de Redis cache bewaard worden.")
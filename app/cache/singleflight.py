@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any
+from typing import Callable
+
+import orjson
+from redis import Redis
+from redis.exceptions import RedisError
+
+log = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one.
+
+    Within a worker, callers with the same key wait for the call already in
+    flight and share its result. With a Redis client, the first worker takes
+    a short lock and publishes its result; the other workers poll for that
+    result instead of repeating the call, and only fall back to calling
+    themselves when the lock holder failed or took longer than lock_timeout.
+    Results shared through Redis must be JSON serializable.
+    """
+
+    def __init__(
+        self,
+        redis: Redis | None = None,
+        lock_timeout: float = 5.0,
+        poll_interval: float = 0.05,
+        prefix: str = "plannen:singleflight",
+    ):
+        self.redis = redis
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._calls: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            return future.result()
+        try:
+            result = self._call_once(key, fn)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def _call_once(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Call fn, or wait for the worker that already holds the lock on key."""
+        if self.redis is None:
+            return fn()
+        result_key = f"{self.prefix}:{key}:resultaat"
+        try:
+            lock = self.redis.lock(
+                f"{self.prefix}:{key}:lock", timeout=self.lock_timeout, blocking=False
+            )
+            acquired = lock.acquire()
+        except RedisError:
+            log.warning("Single flight lock %s kon niet genomen worden.", key)
+            return fn()
+        if not acquired:
+            return self._wait_for_result(lock, result_key, fn)
+        try:
+            result = fn()
+            try:
+                self.redis.set(
+                    result_key, orjson.dumps(result), px=int(self.lock_timeout * 1000)
+                )
+            except RedisError:
+                log.warning("Single flight resultaat %s kon niet gedeeld worden.", key)
+            return result
+        finally:
+            try:
+                lock.release()
+            except RedisError:
+                pass
+
+    def _wait_for_result(self, lock, result_key: str, fn: Callable[[], Any]) -> Any:
+        deadline = time.monotonic() + self.lock_timeout
+        try:
+            while True:
+                raw = self.redis.get(result_key)
+                if raw is not None:
+                    return orjson.loads(raw)
+                if not lock.locked() or time.monotonic() >= deadline:
+                    break
+                time.sleep(self.poll_interval)
+            # The holder may have published just before releasing the lock
+            raw = self.redis.get(result_key)
+        except RedisError:
+            raw = None
+        if raw is not None:
+            return orjson.loads(raw)
+        return fn()
@@ -0,0 +1,181 @@
+import logging
+import math
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+log = logging.getLogger(__name__)
+
+# (minlon, minlat, maxlon, maxlat) in WGS 84
+Bounds = tuple[float, float, float, float]
+
+# Stores a tile and adds it to the sets of its plans, unless an invalidation
+# bumped the generation since the tile was rendered.
+_SET_IF_GENERATION = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+for i = 3, #KEYS do
+    redis.call('SADD', KEYS[i], KEYS[2])
+    redis.call('EXPIRE', KEYS[i], ARGV[3])
+end
+return 1
+"""
+
+
+def _tile_x(lon: float, n: int) -> int:
+    return min(n - 1, max(0, int((lon + 180.0) / 360.0 * n)))
+
+
+def _tile_y(lat: float, n: int) -> int:
+    lat = max(-85.0511, min(85.0511, lat))
+    y = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n
+    return min(n - 1, max(0, int(y)))
+
+
+def tiles_for_bounds(bounds: Bounds, z: int) -> tuple[range, range]:
+    """The x and y ranges of the web mercator tiles at zoom z covering bounds."""
+    minlon, minlat, maxlon, maxlat = bounds
+    n = 2**z
+    return (
+        range(_tile_x(minlon, n), _tile_x(maxlon, n) + 1),
+        range(_tile_y(maxlat, n), _tile_y(minlat, n) + 1),
+    )
+
+
+class TileCache:
+    """
+    Redis cache for rendered vector tiles, invalidated per tile.
+
+    Every cached tile is remembered in a set per plan it contains, which
+    covers the tiles of a plan's old geometry. The tiles of its new geometry
+    are derived from its bounds. A zoom level where a change touches more than
+    max_invalidation tiles is flushed as a whole instead.
+
+    Every invalidation bumps the tile generation. Read it with generation()
+    before rendering and pass it to set(), so a tile rendered from data that
+    changed in the meantime is not written back after its invalidation.
+    """
+
+    def __init__(
+        self,
+        redis: Redis | None,
+        bounds_loader: Callable[[Iterable[int]], list[Bounds]] | None = None,
+        max_zoom: int = 16,
+        ttl: int = 86400,
+        max_invalidation: int = 1024,
+        prefix: str = "plannen:tiles",
+    ):
+        # Tiles are binary: the client must not decode responses
+        self.redis = redis
+        self.bounds_loader = bounds_loader
+        self.max_zoom = max_zoom
+        self.ttl = ttl
+        self.max_invalidation = max_invalidation
+        self.prefix = prefix
+        self._set_if_generation = (
+            redis.register_script(_SET_IF_GENERATION) if redis is not None else None
+        )
+
+    def _key(self, z: int, x: int, y: int) -> str:
+        return f"{self.prefix}:{z}:{x}:{y}"
+
+    def _plan_key(self, plan_id: int) -> str:
+        return f"{self.prefix}:plan:{plan_id}"
+
+    def _generation_key(self) -> str:
+        return f"{self.prefix}:generatie"
+
+    def _keys_for_bounds(
+        self, bounds: list[Bounds], flush_zooms: set[int]
+    ) -> Iterator[str]:
+        for z in range(self.max_zoom + 1):
+            if z in flush_zooms:
+                continue
+            ranges = [tiles_for_bounds(b, z) for b in bounds]
+            if sum(len(xs) * len(ys) for xs, ys in ranges) > self.max_invalidation:
+                flush_zooms.add(z)
+                continue
+            for xs, ys in ranges:
+                for x in xs:
+                    for y in ys:
+                        yield self._key(z, x, y)
+
+    def generation(self) -> str | None:
+        if self.redis is None:
+            return None
+        try:
+            generation = self.redis.get(self._generation_key())
+        except RedisError:
+            log.warning("Generatie van de tiles kon niet gelezen worden.")
+            return None
+        if isinstance(generation, bytes):
+            generation = generation.decode()
+        return generation or "0"
+
+    def get(self, z: int, x: int, y: int) -> bytes | None:
+        if self.redis is None or z > self.max_zoom:
+            return None
+        try:
+            return self.redis.get(self._key(z, x, y))
+        except RedisError:
+            log.warning("Tile %s/%s/%s kon niet uit de cache gelezen worden.", z, x, y)
+            return None
+
+    def set(
+        self,
+        z: int,
+        x: int,
+        y: int,
+        tile: bytes,
+        plan_ids: Iterable[int],
+        generation: str | None,
+    ) -> None:
+        """Store a tile, unless the tiles were invalidated since generation."""
+        if self.redis is None or generation is None or z > self.max_zoom:
+            return
+        key = self._key(z, x, y)
+        try:
+            self._set_if_generation(
+                keys=[
+                    self._generation_key(),
+                    key,
+                    *(self._plan_key(plan_id) for plan_id in plan_ids),
+                ],
+                args=[generation, tile, self.ttl],
+            )
+        except RedisError:
+            log.warning("Tile %s/%s/%s kon niet in de cache bewaard worden.", z, x, y)
+
+    def invalidate(self, plan_ids: Iterable[int]) -> None:
+        """Evict the tiles that contained the plans or contain them now."""
+        plan_ids = list(plan_ids)
+        if self.redis is None or not plan_ids:
+            return
+        try:
+            self.redis.incr(self._generation_key())
+            keys = set()
+            for plan_id in plan_ids:
+                keys.update(
+                    key.decode() if isinstance(key, bytes) else key
+                    for key in self.redis.smembers(self._plan_key(plan_id))
+                )
+            flush_zooms: set[int] = set()
+            if self.bounds_loader is not None:
+                bounds = self.bounds_loader(plan_ids)
+                keys.update(self._keys_for_bounds(bounds, flush_zooms))
+            keys.update(self._plan_key(plan_id) for plan_id in plan_ids)
+            keys = list(keys)
+            for i in range(0, len(keys), 1000):
+                self.redis.delete(*keys[i : i + 1000])
+            for z in flush_zooms:
+                for key in self.redis.scan_iter(match=f"{self.prefix}:{z}:*"):
+                    self.redis.delete(key)
+        except RedisError:
+            log.exception(
+                "Tiles van plannen %s konden niet vervallen worden.", plan_ids
+            )
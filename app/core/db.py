@@ -0,0 +1,40 @@
+from typing import Callable
+from typing import TypeVar
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.search.indexer import DEFERRED_INVALIDATIONS
+
+T = TypeVar("T")
+
+# The session handed out by get_db, depending on settings.DATABASE_ASYNC
+DbSession = Session | AsyncSession
+
+
+def async_database_url(url: str) -> str:
+    """Swap the driver of a postgresql url for asyncpg."""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(
+        hide_password=False
+    )
+
+
+async def run_db(db: DbSession, fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run sync ORM code without blocking the event loop.
+
+    The session is passed to `fn` as the `db` keyword argument, so every
+    PlanService method can be used as is. An AsyncSession runs `fn` through
+    run_sync (lazy loads included), a plain Session runs it in the threadpool.
+    The cache invalidations of an AsyncSession commit are deferred by the
+    indexer and run in the threadpool here, before the result is returned.
+    """
+    if isinstance(db, AsyncSession):
+        result = await db.run_sync(lambda session: fn(*args, db=session, **kwargs))
+        deferred = db.info.get(DEFERRED_INVALIDATIONS) or []
+        while deferred:
+            await run_in_threadpool(deferred.pop(0))
+        return result
+    return await run_in_threadpool(fn, *args, db=db, **kwargs)
@@ -1,9 +1,11 @@
 from contextlib import asynccontextmanager
+from typing import Awaitable
 from typing import Callable
 from typing import Optional
 from typing import Type
 from typing import TypeVar
 
+from elasticsearch8 import Elasticsearch
 from fastapi import Depends
 from fastapi import FastAPI
 from fastapi import HTTPException
@@ -11,26 +13,53 @@ from oe_utils.search.searchengine import SearchEngine
 from oeauth.openid import OpenIDHelper
 from redis import Redis
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import sessionmaker
 from starlette import status
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from storageprovider.client import StorageProviderClient
 from storageprovider.providers.minio import MinioProvider
 
+from app.cache.plannen import PlanCache
+from app.cache.search import SearchCache
+from app.cache.singleflight import SingleFlight
+from app.cache.tiles import TileCache
 from app.constants import settings
+from app.core.db import DbSession
+from app.core.db import async_database_url
+from app.core.db import run_db
 from app.models import Plan
 from app.models import PlanBestand
 from app.models import PlanStatus
 from app.search.index import setup_indexer
+from app.search.indexer import DEFERRED_INVALIDATIONS
 from app.search.indexer import Indexer
+from app.search.memory import InMemorySearchEngine
+from app.services.plannen import PlanService
 from app.storage.conent_manager import ContentManager
 
 # Create database engine
 engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, echo=settings.DEBUG)
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async engine and session factory, only used when DATABASE_ASYNC is set.
+# Objects outlive the commit so the routes can map them outside run_sync.
+async_engine = (
+    create_async_engine(
+        settings.DATABASE_ASYNC_URL or async_database_url(settings.DATABASE_URL),
+        pool_pre_ping=True,
+        echo=settings.DEBUG,
+    )
+    if settings.DATABASE_ASYNC
+    else None
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
 
 # Global instances (initialized on startup)
 _storage_provider: StorageProviderClient | None = None
@@ -39,6 +68,12 @@ _token_provider: OpenIDHelper | None = None
 _indexer: Indexer | None = None
 _redis: Redis | None = None
 _search_engine: SearchEngine | None = None
+_es_client: Elasticsearch | None = None
+_plan_cache: PlanCache | None = None
+_facetten_cache: SearchCache | None = None
+_tile_cache: TileCache | None = None
+_zoek_cache: SearchCache | None = None
+_single_flight: SingleFlight | None = None
 
 
 def _redis_from_settings() -> Redis:
@@ -53,6 +88,12 @@ def _redis_from_settings() -> Redis:
     )
 
 
+def _plan_bounds(plan_ids):
+    """Bounds of the committed plans, for the tile cache invalidation."""
+    with SessionLocal() as db:
+        return PlanService.get_plan_bounds(db, list(plan_ids))
+
+
 class DBSessionMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         request.state.db = SessionLocal()
@@ -78,7 +119,7 @@ class DBSessionMiddleware(BaseHTTPMiddleware):
 async def lifespan(app: FastAPI):
     """Initialize services on startup
     and cleanup on shutdown."""
-    global _storage_provider, _content_manager, _token_provider, _indexer, _redis, _search_engine  # NoQa: B950
+    global _storage_provider, _content_manager, _token_provider, _indexer, _redis, _search_engine, _plan_cache, _es_client, _facetten_cache, _tile_cache, _zoek_cache, _single_flight  # NoQa: B950
 
     # Initialize Redis (shared pool-managed client)
     _redis = _redis_from_settings()
@@ -119,13 +160,52 @@ async def lifespan(app: FastAPI):
     # Initialize search indexer for use in request lifecycle
     _indexer = setup_indexer(app, settings)
 
-    # Initialize search engine
-    _search_engine = SearchEngine(
-        settings.ELASTICSEARCH_URL,
-        settings.ELASTICSEARCH_INDEX,
-        es_version="8",
-        api_key=settings.ELASTICSEARCH_API_KEY,
+    # Initialize plan detail cache, evicted by the indexer on every commit
+    _plan_cache = PlanCache(
+        _redis,
+        max_size=settings.PLAN_CACHE_MAX_SIZE,
+        ttl=settings.PLAN_CACHE_TTL,
+    )
+    _indexer.add_invalidation_listener(_plan_cache.invalidate)
+    _plan_cache.start_listener()
+
+    # Initialize facet and search result caches, expired by the index operations
+    _facetten_cache = SearchCache(_redis, "facetten", ttl=settings.FACETTEN_CACHE_TTL)
+    _zoek_cache = SearchCache(_redis, "zoekresultaten", ttl=settings.ZOEK_CACHE_TTL)
+    _single_flight = SingleFlight(
+        _redis if settings.SINGLE_FLIGHT_REDIS else None,
+        lock_timeout=settings.SINGLE_FLIGHT_LOCK_TIMEOUT,
+    )
+
+    # Initialize vector tile cache on a client that keeps the tiles binary,
+    # evicted per tile by the indexer on every commit
+    _tile_cache = TileCache(
+        Redis.from_url(settings.REDIS_SESSIONS_URL),
+        bounds_loader=_plan_bounds,
+        max_zoom=settings.TILE_CACHE_MAX_ZOOM,
+        ttl=settings.TILE_CACHE_TTL,
     )
+    _indexer.add_invalidation_listener(_tile_cache.invalidate)
+
+    # Initialize search engine
+    if settings.SEARCH_BACKEND == "memory":
+        # One in-process index stands in for both, see app.search.memory
+        _search_engine = _es_client = InMemorySearchEngine()
+        if settings.SEARCH_MEMORY_DOCUMENTS:
+            await run_in_threadpool(
+                _search_engine.load_ndjson, settings.SEARCH_MEMORY_DOCUMENTS
+            )
+    else:
+        _search_engine = SearchEngine(
+            settings.ELASTICSEARCH_URL,
+            settings.ELASTICSEARCH_INDEX,
+            es_version="8",
+            api_key=settings.ELASTICSEARCH_API_KEY,
+        )
+        # Raw client for what SearchEngine doesn't cover (point in time, ...)
+        _es_client = Elasticsearch(
+            settings.ELASTICSEARCH_URL, api_key=settings.ELASTICSEARCH_API_KEY
+        )
 
     yield  # Application runs here
 
@@ -134,6 +214,11 @@ async def lifespan(app: FastAPI):
     #     await _token_provider.close()
     # if hasattr(_storage_provider, 'close'):
     #     await _storage_provider.close()
+    _plan_cache.stop_listener()
+    if async_engine is not None:
+        await async_engine.dispose()
+    _es_client.close()
+    _tile_cache.redis.close()
 
     _storage_provider = None
     _content_manager = None
@@ -141,6 +226,12 @@ async def lifespan(app: FastAPI):
     _indexer = None
     _redis = None
     _search_engine = None
+    _plan_cache = None
+    _es_client = None
+    _facetten_cache = None
+    _tile_cache = None
+    _zoek_cache = None
+    _single_flight = None
 
 
 # Dependency functions
@@ -180,15 +271,66 @@ def get_searchengine() -> SearchEngine:
     return _search_engine
 
 
+def get_es_client() -> Elasticsearch:
+    if _es_client is None:
+        raise HTTPException(
+            status_code=503, detail="Elasticsearch client not initialized"
+        )
+    return _es_client
+
+
+def get_plan_cache() -> PlanCache:
+    if _plan_cache is None:
+        raise HTTPException(status_code=503, detail="Plan cache not initialized")
+    return _plan_cache
+
+
+def get_zoek_cache() -> SearchCache:
+    if _zoek_cache is None:
+        raise HTTPException(status_code=503, detail="Search cache not initialized")
+    return _zoek_cache
+
+
+def get_single_flight() -> SingleFlight:
+    if _single_flight is None:
+        raise HTTPException(status_code=503, detail="Single flight not initialized")
+    return _single_flight
+
+
+def get_tile_cache() -> TileCache:
+    if _tile_cache is None:
+        raise HTTPException(status_code=503, detail="Tile cache not initialized")
+    return _tile_cache
+
+
+def get_facetten_cache() -> SearchCache:
+    if _facetten_cache is None:
+        raise HTTPException(status_code=503, detail="Facet cache not initialized")
+    return _facetten_cache
+
+
 T = TypeVar("T")
 
 
-def get_db(
+async def get_db(
     content_manager: "ContentManager" = Depends(get_content_manager),
     redis: Redis = Depends(get_redis),
     indexer: Indexer = Depends(get_indexer),
 ):
-    """Dependency to get database session."""
+    """
+    Dependency to get database session.
+    An AsyncSession when DATABASE_ASYNC is set, a sync Session otherwise.
+    """
+    if settings.DATABASE_ASYNC:
+        async with AsyncSessionLocal() as db_session:
+            db_session.info["content_manager"] = content_manager
+            # Cache invalidations make blocking calls, run_db runs them off the loop
+            db_session.info[DEFERRED_INVALIDATIONS] = []
+            # The indexer listens on the sync Session the AsyncSession wraps
+            indexer.register_session(db_session.sync_session, redis)
+            yield db_session
+        return
+
     db_session = SessionLocal()
     db_session.info["content_manager"] = content_manager
     indexer.register_session(db_session, redis)
@@ -196,12 +338,12 @@ def get_db(
     try:
         yield db_session
     finally:
-        db_session.close()
+        await run_in_threadpool(db_session.close)
 
 
 def get_object_or_404(
     model: Type[T], id_field: str = "id", error_message: Optional[str] = None
-) -> Callable[[int, Session], T]:
+) -> Callable[[int, DbSession], Awaitable[T]]:
     """
     Generic dependency to get an object by ID or raise 404 if not found.
     :param model:
@@ -210,9 +352,11 @@ def get_object_or_404(
     :return:
     """
 
-    def dependency(object_id: int, db: Session = Depends(get_db)) -> T:
-        query = db.query(model).filter(getattr(model, id_field) == object_id)
-        obj = query.first()
+    def load(db: Session, object_id: int) -> T:
+        return db.query(model).filter(getattr(model, id_field) == object_id).first()
+
+    async def dependency(object_id: int, db: DbSession = Depends(get_db)) -> T:
+        obj = await run_db(db, load, object_id=object_id)
 
         if obj is None:
             msg = error_message or f"{model.__name__} with id {object_id} not found"
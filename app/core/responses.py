@@ -0,0 +1,18 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+# The options of ORJSONResponse, plus UTC datetimes ending in "Z" as pydantic
+# serializes them instead of orjson's "+00:00"
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+
+def orjson_dumps(content: Any) -> bytes:
+    """Serialize trusted output the way the response models would."""
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class ORJSONUTCResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson_dumps(content)
@@ -1,8 +1,11 @@
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 
+from app.search.memory import UnsupportedSearch
+from .handlers import unsupported_search_handler
 from .handlers import validation_exception_handler
 
 
 def register_exception_handlers(app: FastAPI):
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.add_exception_handler(UnsupportedSearch, unsupported_search_handler)
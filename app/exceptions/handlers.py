@@ -2,6 +2,8 @@ from fastapi import Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
+from app.search.memory import UnsupportedSearch
+
 
 # Todo: customize evt verder
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -16,6 +18,13 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
+async def unsupported_search_handler(request: Request, exc: UnsupportedSearch):
+    return JSONResponse(
+        status_code=501,
+        content={"detail": str(exc), "message": "Not Implemented"},
+    )
+
+
 # async def not_found_exception_handler(
 #         request: Request,
 #         exc: RequestValidationError
@@ -123,92 +123,121 @@ def pydantic_bestand_to_db(
     return db_bestand
 
 
+def plan_db_to_dict(plan: models.Plan, request: Request = None) -> dict:
+    """
+    Map a SQLAlchemy Plan model to a PlanResponse shaped dict.
+    Trusted output: nothing is validated, the dict can go straight to orjson.
+    """
+    return {
+        "id": plan.id,
+        "uri": settings.PLANNEN_URI.format(id=plan.id),
+        "self": str(request.url_for("get_plan", plan_id=plan.id)),
+        "onderwerp": plan.onderwerp,
+        "datum_goedkeuring": plan.datum_goedkeuring,
+        "startdatum": plan.startdatum,
+        "einddatum": plan.einddatum,
+        "beheerscommissie": plan.beheerscommissie,
+        "actief": plan.status.actief if plan.status else False,
+        "geometrie": convert_wktelement_to_geojson(plan.geometrie),
+        "locatie_elementen": [
+            locatie_element_db_to_dict(element) for element in plan.locatie_elementen
+        ],
+        "bestanden": [bestand_db_to_dict(bestand) for bestand in plan.bestanden],
+        "erfgoedobjecten": [
+            erfgoedobject.erfgoedobject_id for erfgoedobject in plan.erfgoedobjecten
+        ],
+        "relaties": [relatie_db_to_dict(relatie) for relatie in plan.relaties],
+        "statussen": [status_db_to_dict(status) for status in plan.statussen],
+        "status": status_db_to_dict(plan.status) if plan.status else None,
+    }
+
+
 def plan_db_to_pydantic(
     plan: models.Plan, request: Request = None
 ) -> schemas.PlanResponse:
     """Map a SQLAlchemy Plan model to a pydantic PlanResponse."""
-    return schemas.PlanResponse(
-        id=plan.id,
-        uri=settings.PLANNEN_URI.format(id=plan.id),
-        self=str(request.url_for("get_plan", plan_id=plan.id)),
-        onderwerp=plan.onderwerp,
-        datum_goedkeuring=plan.datum_goedkeuring,
-        startdatum=plan.startdatum,
-        einddatum=plan.einddatum,
-        beheerscommissie=plan.beheerscommissie,
-        actief=plan.status.actief if plan.status else False,
-        geometrie=schemas.Geometrie(**convert_wktelement_to_geojson(plan.geometrie)),
-        locatie_elementen=[
-            locatie_element_db_to_pydantic(element)
-            for element in plan.locatie_elementen
-        ],
-        bestanden=[bestand_db_to_pydantic(bestand) for bestand in plan.bestanden],
-        erfgoedobjecten=[
-            erfgoedobject.erfgoedobject_id for erfgoedobject in plan.erfgoedobjecten
-        ],
-        relaties=[relatie_db_to_pydantic(relatie) for relatie in plan.relaties],
-        statussen=[status_db_to_pydantic(status) for status in plan.statussen],
-        status=status_db_to_pydantic(plan.status) if plan.status else None,
-    )
+    return schemas.PlanResponse.model_validate(plan_db_to_dict(plan, request))
+
+
+def locatie_element_db_to_dict(element: models.LocatieElement) -> dict:
+    """Map a SQLAlchemy LocatieElement model to a LocatieElementResponse dict."""
+    return {
+        "id": element.id,
+        "type": element.type,
+        "provincie": {
+            "niscode": element.provincie_niscode,
+            "naam": element.provincie_naam,
+        },
+        "gemeente": {
+            "niscode": element.gemeente_niscode,
+            "naam": element.gemeente_naam,
+        },
+    }
 
 
 def locatie_element_db_to_pydantic(
     element: models.LocatieElement,
 ) -> schemas.LocatieElementResponse:
     """Map a SQLAlchemy LocatieElement model to a pydantic LocatieElementResponse."""
-    return schemas.LocatieElementResponse(
-        id=element.id,
-        type=element.type,
-        provincie=schemas.Provincie(
-            niscode=element.provincie_niscode,
-            naam=element.provincie_naam,
-        ),
-        gemeente=schemas.Gemeente(
-            niscode=element.gemeente_niscode,
-            naam=element.gemeente_naam,
-        ),
+    return schemas.LocatieElementResponse.model_validate(
+        locatie_element_db_to_dict(element)
     )
 
 
+def bestand_db_to_dict(bestand: models.PlanBestand) -> dict:
+    """Map a SQLAlchemy PlanBestand model to a BestandResponse dict."""
+    return {
+        "id": bestand.id,
+        "plan_id": bestand.plan_id,
+        "naam": bestand.naam,
+        "mime": bestand.mime,
+        "bestandssoort_id": bestand.bestandssoort.id,
+    }
+
+
 def bestand_db_to_pydantic(
     bestand: models.PlanBestand, request: Request = None
 ) -> schemas.BestandResponse:
     """Map a SQLAlchemy PlanBestand model to a pydantic BestandResponse."""
-    return schemas.BestandResponse(
-        id=bestand.id,
-        plan_id=bestand.plan_id,
-        naam=bestand.naam,
-        mime=bestand.mime,
-        bestandssoort_id=bestand.bestandssoort.id,
-    )
+    return schemas.BestandResponse.model_validate(bestand_db_to_dict(bestand))
+
+
+def status_db_to_dict(status: models.PlanStatus) -> dict:
+    """Map a SQLAlchemy PlanStatus model to a StatusResponse dict."""
+    return {
+        "plan_id": status.plan_id,
+        "id": status.id,
+        "status_id": status.status.id,
+        "naam": status.status.naam,
+        "datum": status.datum,
+        "aanpasser_uri": status.aanpasser_uri,
+        "aanpasser_omschrijving": status.aanpasser_omschrijving,
+        "opmerkingen": status.opmerkingen,
+        "actief": status.actief,
+    }
 
 
 def status_db_to_pydantic(
     status: models.PlanStatus, request: Request = None
 ) -> schemas.StatusResponse:
     """Map a SQLAlchemy PlanStatus model to a pydantic StatusResponse."""
-    return schemas.StatusResponse(
-        plan_id=status.plan_id,
-        id=status.id,
-        status_id=status.status.id,
-        naam=status.status.naam,
-        datum=status.datum,
-        aanpasser_uri=status.aanpasser_uri,
-        aanpasser_omschrijving=status.aanpasser_omschrijving,
-        opmerkingen=status.opmerkingen,
-        actief=status.actief,
-    )
+    return schemas.StatusResponse.model_validate(status_db_to_dict(status))
+
+
+def relatie_db_to_dict(relatie: models.PlanRelatie) -> dict:
+    """Map a SQLAlchemy PlanRelatie model to a RelatieResponse dict."""
+    return {
+        "id": relatie.naar.id,
+        "type": {
+            "id": relatie.relatietype.id,
+            "type": relatie.relatietype.type,
+            "inverse": relatie.relatietype.inverse,
+        },
+    }
 
 
 def relatie_db_to_pydantic(
     relatie: models.PlanRelatie, request: Request = None
 ) -> schemas.RelatieResponse:
     """Map a SQLAlchemy PlanRelatie model to a pydantic RelatieResponse."""
-    return schemas.RelatieResponse(
-        id=relatie.naar.id,
-        type=schemas.RelatieTypeResponse(
-            id=relatie.relatietype.id,
-            type=relatie.relatietype.type,
-            inverse=relatie.relatietype.inverse,
-        ),
-    )
+    return schemas.RelatieResponse.model_validate(relatie_db_to_dict(relatie))
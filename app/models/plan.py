@@ -19,9 +19,7 @@ from sqlalchemy import Integer
 from sqlalchemy import String
 from sqlalchemy import Text
 from sqlalchemy import func
-from sqlalchemy import select
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import Session
 from sqlalchemy.orm import relationship
 
 try:
@@ -67,6 +65,17 @@ class Plan(Base):
     einddatum: Mapped[date | None] = mapped_column(Date)
     beheerscommissie: Mapped[bool | None] = mapped_column(Boolean)
     geometrie: Mapped[Any | None] = mapped_column(_geometry_field())
+    # Meest recente status, bijgehouden door PlanService.add_status/delete_status.
+    status_id: Mapped[int | None] = mapped_column(
+        Integer,
+        ForeignKey(
+            "plannen_statussen.id",
+            use_alter=True,
+            name="plannen_status_id_fkey",
+            ondelete="SET NULL",
+        ),
+        index=True,
+    )
 
     relaties: Mapped[list[PlanRelatie]] = relationship(
         "PlanRelatie",
@@ -82,9 +91,15 @@ class Plan(Base):
     )
     statussen: Mapped[list[PlanStatus]] = relationship(
         "PlanStatus",
+        foreign_keys="PlanStatus.plan_id",
         cascade="all, delete-orphan",
         back_populates="plan",
     )
+    status: Mapped[PlanStatus | None] = relationship(
+        "PlanStatus",
+        foreign_keys=[status_id],
+        post_update=True,
+    )
     concepten: Mapped[list[PlanConcept]] = relationship(
         "PlanConcept",
         cascade="all, delete-orphan",
@@ -125,6 +140,7 @@ class Plan(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=func.now(),
+        onupdate=func.clock_timestamp(),
         nullable=False,
     )
 
@@ -145,20 +161,6 @@ class Plan(Base):
             (c for c in self.concepten if c.plankenmerk.id == "plantypes"), None
         )
 
-    @hybrid_property
-    def status(self) -> PlanStatus | None:
-        session = Session.object_session(self)
-        if session is None:
-            return None
-
-        stmt = (
-            select(PlanStatus)
-            .filter_by(plan_id=self.id)
-            .order_by(PlanStatus.datum.desc())
-            .limit(1)
-        )
-        return session.scalars(stmt).first()
-
     def self(self) -> str:
         return settings.PLANNEN_URI
 
@@ -271,7 +273,9 @@ class PlanStatus(Base):
         nullable=False,
     )
     opmerkingen: Mapped[str | None] = mapped_column(Text)
-    plan: Mapped[Plan] = relationship("Plan", back_populates="statussen")
+    plan: Mapped[Plan] = relationship(
+        "Plan", foreign_keys=[plan_id], back_populates="statussen"
+    )
 
     @hybrid_property
     def actief(self) -> bool:
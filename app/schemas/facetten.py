@@ -0,0 +1,16 @@
+from typing import List
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class FacetBucket(BaseModel):
+    key: str | int
+    doc_count: int
+
+
+class FacetResponse(BaseModel):
+    naam: str
+    label: str
+    filter: Optional[str] = None
+    buckets: List[FacetBucket]
@@ -244,6 +244,13 @@ class PlanResponse(PlanBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class PlanBatchResponse(BaseModel):
+    """Schema for a batch of plans fetched by id."""
+
+    plannen: List[PlanResponse]
+    niet_gevonden: List[int]
+
+
 class GeometryList(BaseModel):
     type: Literal["Polygon"]
     # GeoJSON Polygon: [[[lon, lat], ...]]
@@ -295,3 +302,63 @@ class PlanListResponse(BaseModel):
         "str_strip_whitespace": True,
         "extra": "ignore",  # ignore unexpected fields
     }
+
+
+class GeoPunt(BaseModel):
+    lat: float
+    lon: float
+
+
+class GeoEnvelope(BaseModel):
+    type: Literal["envelope"]
+    # [[minlon, maxlat], [maxlon, minlat]]
+    coordinates: List[List[float]]
+
+
+class PlanListSparseResponse(BaseModel):
+    """PlanListResponse limited to the velden asked for."""
+
+    id: int
+    uri: Optional[HttpUrl] = None
+    self_url: Optional[HttpUrl] = Field(None, alias="self")
+    onderwerp: Optional[str] = None
+
+    startdatum: Optional[date] = None
+    einddatum: Optional[date] = None
+    datum_goedkeuring: Optional[date] = None
+
+    beheerscommissie: Optional[bool] = None
+    geometrie: Optional[GeometryList] = None
+
+    plantype: Optional[str] = None
+    plantype_naam: Optional[str] = None
+    bestanden: Optional[str] = None
+
+    erfgoedobjecten: Optional[List[HttpUrl]] = None
+    primair_bestand: Optional[str] = None
+
+    systemfields: Optional[SystemFields] = None
+    status: Optional[StatusList] = None
+    actief: Optional[bool] = None
+
+    # Only with velden=, e.g. for map markers without the full geometrie
+    geometrie_centroid: Optional[GeoPunt] = None
+    geometrie_bbox: Optional[GeoEnvelope] = None
+
+    model_config = PlanListResponse.model_config
+
+
+class SuggestieResponse(BaseModel):
+    id: int
+    onderwerp: str
+    self_url: HttpUrl = Field(alias="self")
+
+    model_config = {"populate_by_name": True}
+
+
+class ClusterResponse(BaseModel):
+    """Plannen in one geotile cell, e.g. cel "7/65/42"."""
+
+    cel: str
+    aantal: int
+    centroid: GeoPunt
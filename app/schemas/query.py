@@ -1,13 +1,27 @@
 from datetime import date
+from typing import Literal
 
 from oe_utils.validation.pydantic_es_filters import IntQueryparam
 from oe_utils.validation.pydantic_es_filters import StrQueryparam
 from pydantic import BaseModel
 from pydantic import Field
+from pydantic import field_validator
 
+from app.schemas.plannen import PlanListSparseResponse
+from app.search import beheersplan_aggregations
+from app.search.geo import parse_afstand
+from app.search.geo import parse_bbox
+from app.search.geo import parse_geometrie
+
+# Velden die met velden= opgevraagd kunnen worden, "self" in plaats van self_url
+LIJST_VELDEN = [
+    field.alias or name for name, field in PlanListSparseResponse.model_fields.items()
+]
+
+
+class ZoekFilters(BaseModel):
+    """Filters die de set plannen bepalen, zonder sortering of paginering."""
 
-class FilterParams(BaseModel):
-    sort: str | None = None
     tekst: str | None = None
     id: IntQueryparam | None = None
     onderwerp: StrQueryparam | None = None
@@ -24,7 +38,49 @@ class FilterParams(BaseModel):
     datum_goedkeuring_tot: date | None = None
     beheersplan_verlopen: bool | None = None
     aanduidingsobjecttype: StrQueryparam | None = None
+    bbox: str | None = Field(
+        None,
+        description="Enkel plannen binnen deze bbox: minx,miny,maxx,maxy in WGS 84.",
+    )
+    intersecteert: str | None = Field(
+        None,
+        description="Enkel plannen die deze geometrie snijden, GeoJSON of WKT "
+        "in WGS 84.",
+    )
+    binnen_afstand: str | None = Field(
+        None,
+        description="Enkel plannen binnen een afstand van een punt: lon,lat,afstand "
+        "in WGS 84, de afstand in meter of met eenheid (m, km).",
+    )
 
+    @field_validator("bbox")
+    @classmethod
+    def check_bbox(cls, value):
+        if value is not None:
+            parse_bbox(value)
+        return value
+
+    @field_validator("intersecteert")
+    @classmethod
+    def check_intersecteert(cls, value):
+        if value is not None:
+            parse_geometrie(value)
+        return value
+
+    @field_validator("binnen_afstand")
+    @classmethod
+    def check_binnen_afstand(cls, value):
+        if value is not None:
+            parse_afstand(value)
+        return value
+
+
+class FilterParams(ZoekFilters):
+    sort: str | None = None
+    alleen_aantal: bool | None = Field(
+        None,
+        description="Enkel het aantal plannen teruggeven, zonder de plannen zelf.",
+    )
     per_pagina: int | None = Field(
         None,
         ge=1,
@@ -35,3 +91,94 @@ class FilterParams(BaseModel):
         ge=1,
         description="Op te halen pagina indien er vele resultaten zijn.",
     )
+    cursor: str | None = Field(
+        None,
+        description="Cursor paginering: * voor de eerste pagina, "
+        "daarna de cursor uit de Link header.",
+    )
+    geometrie_detail: Literal["volledig", "midden", "laag"] | None = Field(
+        None,
+        description="Detailniveau van de geometrie: volledig (standaard), "
+        "midden (5m) of laag (50m) voor kaartoverzichten.",
+    )
+    velden: list[str] | None = Field(
+        None,
+        description="Komma-gescheiden lijst van velden die teruggegeven worden: "
+        + ", ".join(LIJST_VELDEN),
+    )
+
+    @field_validator("velden", mode="before")
+    @classmethod
+    def split_velden(cls, value):
+        if value is None:
+            return value
+        if isinstance(value, str):
+            value = [value]
+        velden = [part.strip() for item in value for part in str(item).split(",")]
+        onbekend = [veld for veld in velden if veld and veld not in LIJST_VELDEN]
+        if onbekend:
+            raise ValueError(f"Onbekende velden: {', '.join(onbekend)}")
+        return list(dict.fromkeys(veld for veld in velden if veld))
+
+
+class FacettenParams(ZoekFilters):
+    facetten: list[str] | None = Field(
+        None,
+        description="Komma-gescheiden lijst van facetten, standaard allemaal: "
+        + ", ".join(beheersplan_aggregations),
+    )
+
+    @field_validator("facetten", mode="before")
+    @classmethod
+    def split_facetten(cls, value):
+        if value is None:
+            return value
+        if isinstance(value, str):
+            value = [value]
+        facetten = [part.strip() for item in value for part in str(item).split(",")]
+        onbekend = [
+            facet
+            for facet in facetten
+            if facet and facet not in beheersplan_aggregations
+        ]
+        if onbekend:
+            raise ValueError(f"Onbekende facetten: {', '.join(onbekend)}")
+        return list(dict.fromkeys(facet for facet in facetten if facet))
+
+
+class ClusterParams(ZoekFilters):
+    precisie: int = Field(
+        7,
+        ge=0,
+        le=29,
+        description="Geotile precisie van de clusters, meestal het zoomniveau "
+        "van de kaart.",
+    )
+
+
+class SuggestieParams(BaseModel):
+    q: str = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Begin van de woorden in het onderwerp, zoals getypt.",
+    )
+    aantal: int = Field(10, ge=1, le=25, description="Maximum aantal suggesties.")
+
+
+class BatchParams(BaseModel):
+    ids: list[int] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Id's van de op te halen plannen, komma-gescheiden of herhaald.",
+    )
+
+    @field_validator("ids", mode="before")
+    @classmethod
+    def split_ids(cls, value):
+        if isinstance(value, str):
+            value = [value]
+        ids = [part.strip() for item in value for part in str(item).split(",")]
+        # Keep the requested order, but fetch every plan only once
+        return list(dict.fromkeys(part for part in ids if part))
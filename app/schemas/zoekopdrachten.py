@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Annotated
+
+from pydantic import BaseModel
+from pydantic import Field
+from pydantic import HttpUrl
+
+from app.schemas.query import ZoekFilters
+
+
+class ZoekopdrachtCreate(BaseModel):
+    naam: Annotated[str, Field(min_length=1, max_length=255)]
+    filters: ZoekFilters = Field(default_factory=ZoekFilters)
+
+
+class ZoekopdrachtResponse(BaseModel):
+    id: str
+    naam: str
+    filters: dict
+    aangemaakt: datetime
+    self_url: HttpUrl = Field(alias="self")
+    treffers: HttpUrl
+
+    model_config = {"populate_by_name": True}
+
+
+class TrefferResponse(BaseModel):
+    """A plan that matched a saved search when it was indexed."""
+
+    id: int
+    self_url: HttpUrl = Field(alias="self")
+    tijdstip: datetime
+
+    model_config = {"populate_by_name": True}
@@ -0,0 +1,175 @@
+"""
+Gebruik:
+
+python -m app.scripts.benchmark_serialization [--vertices N] [--herhalingen N]
+    [--lijst N]
+
+Vergelijkt de serialisatie van een plan detail via pydantic (valideren en
+opnieuw valideren tegen het response_model, json.dumps) met het pad voor
+vertrouwde output (plan_db_to_dict en orjson). Het plan is synthetisch en
+heeft een geometrie met N vertices (default 10000).
+
+Met --lijst N wordt een pagina van N plannen uit de lijst vergeleken:
+valideren tegen PlanListResponse of de ES hits rechtstreeks met orjson.
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from datetime import date
+from datetime import datetime
+from types import SimpleNamespace
+
+import orjson
+from geoalchemy2.shape import from_shape
+from pytz import timezone
+from shapely.geometry import MultiPolygon
+from shapely.geometry import Point
+
+from app.core.responses import orjson_dumps
+from app.mappers.plannen import plan_db_to_dict
+from app.mappers.plannen import plan_db_to_pydantic
+from app.schemas.plannen import PlanListResponse
+from app.schemas.plannen import PlanResponse
+from app.search.mapping.plannen import map_es_beheersplannen_result
+
+
+class _Request:
+    def url_for(self, name, **path_params):
+        return f"https://plannen.test/api/v1/plannen/{path_params['plan_id']}"
+
+
+def maak_plan(vertices: int):
+    # buffer() geeft 4 * quad_segs + 1 punten per ring
+    cirkel = Point(173313.88, 174486.41).buffer(500, quad_segs=max(vertices // 4, 1))
+    status = SimpleNamespace(
+        id=1,
+        plan_id=1,
+        status=SimpleNamespace(id=75, naam="Actief"),
+        datum=datetime(2025, 10, 16, 16, 11, 32, tzinfo=timezone("CET")),
+        aanpasser_uri="https://id.erfgoed.net/actoren/501",
+        aanpasser_omschrijving="Onroerend Erfgoed",
+        opmerkingen=None,
+        actief=True,
+    )
+    return SimpleNamespace(
+        id=1,
+        onderwerp="Benchmark plan",
+        datum_goedkeuring=date(2025, 10, 1),
+        startdatum=date(2025, 10, 1),
+        einddatum=date(2049, 10, 1),
+        beheerscommissie=True,
+        geometrie=from_shape(MultiPolygon([cirkel]), srid=31370),
+        status=status,
+        statussen=[status],
+        locatie_elementen=[
+            SimpleNamespace(
+                id=1,
+                type="https://id.erfgoed.net/vocab/ontology#LocatieElement",
+                provincie_niscode="20001",
+                provincie_naam="Vlaams-Brabant",
+                gemeente_niscode="24062",
+                gemeente_naam="Leuven",
+            )
+        ],
+        bestanden=[],
+        erfgoedobjecten=[
+            SimpleNamespace(
+                erfgoedobject_id=f"https://id.erfgoed.net/aanduidingsobjecten/{i}"
+            )
+            for i in range(50)
+        ],
+        relaties=[],
+    )
+
+
+def gevalideerd(plan, request) -> bytes:
+    model = plan_db_to_pydantic(plan, request)
+    model = PlanResponse.model_validate(model.model_dump())
+    return json.dumps(model.model_dump(mode="json")).encode("utf-8")
+
+
+def vertrouwd(plan, request) -> bytes:
+    return orjson_dumps(plan_db_to_dict(plan, request))
+
+
+def maak_hits(aantal: int, vertices: int) -> dict:
+    ring = [[4.7 + i / vertices, 50.88 + (i % 2) / 1000] for i in range(vertices)]
+    plan = {
+        "id": 1,
+        "onderwerp": "Benchmark plan",
+        "startdatum": "2025-10-01",
+        "einddatum": "2049-10-01",
+        "datum_goedkeuring": "2025-10-01",
+        "beheerscommissie": True,
+        "geometrie": {"type": "Polygon", "coordinates": [ring + ring[:1]]},
+        "plantype": "https://id.erfgoed.net/thesauri/plantypes/1",
+        "plantype_naam": "Landschapsbeheersplan",
+        "bestanden": "",
+        "erfgoedobjecten": [
+            f"https://id.erfgoed.net/aanduidingsobjecten/{i}" for i in range(50)
+        ],
+        "systemfields": {
+            "created_at": "2025-10-16T16:11:32+02:00",
+            "updated_at": "2025-10-16T16:11:32+02:00",
+        },
+        "status": {
+            "datum": "2025-10-16T16:11:32+02:00",
+            "aanpasser_uri": "https://id.erfgoed.net/actoren/501",
+            "aanpasser_omschrijving": "Onroerend Erfgoed",
+            "status": 75,
+            "actief": True,
+        },
+    }
+    return {"hits": {"hits": [{"_source": {**plan, "id": i}} for i in range(aantal)]}}
+
+
+def lijst_gevalideerd(result, settings) -> bytes:
+    plannen = map_es_beheersplannen_result(
+        "https://plannen.test/api/v1/plannen/{id}", result, settings
+    )
+    return orjson.dumps(
+        [
+            PlanListResponse.model_validate(plan).model_dump(mode="json", by_alias=True)
+            for plan in plannen
+        ]
+    )
+
+
+def lijst_vertrouwd(result, settings) -> bytes:
+    return orjson_dumps(
+        map_es_beheersplannen_result(
+            "https://plannen.test/api/v1/plannen/{id}", result, settings
+        )
+    )
+
+
+def main(argv=sys.argv):  # pragma NO COVER
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vertices", type=int, default=10000)
+    parser.add_argument("--herhalingen", type=int, default=20)
+    parser.add_argument("--lijst", type=int, default=None)
+    args = parser.parse_args(argv[1:])
+
+    if args.lijst:
+        argumenten = (
+            maak_hits(args.lijst, args.vertices),
+            SimpleNamespace(PLANNEN_URI="https://id.erfgoed.net/plannen/{id}"),
+        )
+        functies = (("pydantic", lijst_gevalideerd), ("orjson", lijst_vertrouwd))
+        eenheid = f"pagina van {args.lijst}"
+    else:
+        argumenten = (maak_plan(args.vertices), _Request())
+        functies = (("pydantic", gevalideerd), ("orjson", vertrouwd))
+        eenheid = "plan"
+    for naam, functie in functies:
+        tijd = timeit.timeit(lambda: functie(*argumenten), number=args.herhalingen)
+        print(
+            f"{naam:>8}: {tijd / args.herhalingen * 1000:8.2f} ms per {eenheid}, "
+            f"{len(functie(*argumenten))} bytes"
+        )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main(sys.argv)
@@ -27,10 +27,17 @@ Er zijn extra optionele parameters:
   De maximum hoeveelheid items per keer wordt opgehaald uit de database en
   geherindexeert. Default 5000. Deze parameter is enkel zinnig bij herindexeren
   en wordt genegeerd zonder --reindex.
+
+--ndjson BESTAND
+  Schrijf de documenten van de items uit de database naar BESTAND, één per
+  lijn, in plaats van ze te indexeren. De index blijft ongemoeid. Met
+  SEARCH_MEMORY_DOCUMENTS laadt de in-memory zoekmachine (SEARCH_BACKEND=memory)
+  dit bestand bij het opstarten.
 """
 
 import abc
 import argparse
+import json
 import logging
 import sys
 import time
@@ -51,8 +58,12 @@ from app import constants as c
 from app.models import Plan
 from app.search import index
 from app.search.index import beheersplan_to_es_dict
+from app.search.index import encode_beheersplan
+from app.search.index import expire_search_caches
+from app.search.mapping.plannen import beheersplannen_create_body
 from app.search.mapping.plannen import beheersplannen_index
 from app.search.mapping.plannen import beheersplannen_mapping
+from app.search.zoekopdrachten import ensure_zoekopdrachten_index
 from app.skos import fill_registry
 
 log = logging.getLogger(__name__)
@@ -89,6 +100,13 @@ def init_argparse(args):
         help="De maximum hoeveelheid objecten per "
         "keer worden opgehaald uit de database.",
     )
+    parser.add_argument(
+        "--ndjson",
+        default=None,
+        type=str,
+        help="Schrijf de documenten naar dit NDJSON bestand in plaats van ze "
+        "te indexeren.",
+    )
 
     return parser.parse_args(args)
 
@@ -112,6 +130,18 @@ def fill_erfgoedobjecten(searchengine, plannen):
     erfgoedobjecten.update({hit["_source"]["uri"]: hit["_source"] for hit in hits})
 
 
+class NdjsonWriter:
+    """Schrijft de documenten naar een NDJSON bestand in plaats van de index."""
+
+    def __init__(self, bestand):
+        self.bestand = bestand
+
+    def bulk_add_to_index(self, objects):
+        for document in objects:
+            self.bestand.write(json.dumps(document, default=encode_beheersplan))
+            self.bestand.write("\n")
+
+
 class Reindexer:
 
     def __init__(
@@ -124,6 +154,7 @@ class Reindexer:
     ):
         super().__init__()
         self.db_class = db_class
+        self.index_setting = setting_index_name
         self.searchengine = SearchEngine(
             settings["ELASTICSEARCH_URL"],
             settings[setting_index_name],
@@ -140,6 +171,9 @@ class Reindexer:
         self.index_data = index_data
         self.mapping = mapping
         self.settings = settings
+        self.es = Elasticsearch(
+            settings["ELASTICSEARCH_URL"], api_key=settings["ELASTICSEARCH_API_KEY"]
+        )
         self.inventaris_ao_searchengine = Elasticsearch(
             f'{settings["ELASTICSEARCH_URL"]}/inventaris_aanduidingsobjecten',
             api_key=settings["ELASTICSEARCH_API_KEY"],
@@ -151,8 +185,11 @@ class Reindexer:
 
     def recreate_index(self):
         self.searchengine.remove_index()
-        self.searchengine.create_index(data=beheersplannen_index)
-        self.searchengine.add_mapping(beheersplannen_mapping)
+        self.es.indices.create(
+            index=self.settings[self.index_setting], **beheersplannen_create_body()
+        )
+        # The saved searches are kept, they follow the new plannen mapping
+        ensure_zoekopdrachten_index(self.es, self.settings[self.index_setting])
 
     def reindex(
         self,
@@ -250,19 +287,26 @@ def main(argv=sys.argv):  # pragma NO COVER
     reindexer = PlanReindexer(settings)
     skos_registry = Registry()
     fill_registry(skos_registry, settings)
+    reindex_args = dict(
+        batch_size=args.batch_size,
+        limit=args.limit,
+        offset=args.offset or 0,
+        db_id=args.id,
+        skos_registry=skos_registry,
+    )
+    if args.ndjson:
+        with open(args.ndjson, "w", encoding="utf-8") as bestand:
+            reindexer.searchengine = NdjsonWriter(bestand)
+            with db_session(settings) as session:
+                reindexer.reindex(session, open_id_helper, **reindex_args)
+        return
     if args.id is None and args.offset is None:
         reindexer.recreate_index()
     if reindex:
         with db_session(settings) as session:
-            reindexer.reindex(
-                session,
-                open_id_helper,
-                batch_size=args.batch_size,
-                limit=args.limit,
-                offset=args.offset or 0,
-                db_id=args.id,
-                skos_registry=skos_registry,
-            )
+            reindexer.reindex(session, open_id_helper, **reindex_args)
+        reindexer.es.indices.refresh(index=settings["ELASTICSEARCH_INDEX"])
+    expire_search_caches(settings)
 
 
 if __name__ == "__main__":  # pragma: no cover
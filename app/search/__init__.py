@@ -90,6 +90,25 @@ class SearchHelper:
         """
         return self.aggregation_provider_map.get(aggregationname, None)
 
+    def get_facetten(self, aggregations):
+        """
+        Zet (gefixte) aggregations om naar facetten, in de volgorde van
+        aggregation_order, met het label en de filter van elke aggregation.
+        """
+        return [
+            {
+                "naam": name,
+                "label": self.aggregation_label_map.get(name, name.capitalize()),
+                "filter": self.get_filter_for_aggregation(name),
+                "buckets": [
+                    {"key": bucket["key"], "doc_count": bucket["doc_count"]}
+                    for bucket in aggregations[name].get("buckets", [])
+                ],
+            }
+            for name in self.aggregation_order
+            if name in aggregations
+        ]
+
 
 def get_search_helper(request):
     return SearchHelper(request)
@@ -102,6 +121,6 @@ def fix_aggregations(aggregations):
         entries = aggregations[key].get("buckets", [])
         aggregations[key]["buckets"] = sorted(entries, key=lambda k: k["doc_count"])
         aggregations[key]["buckets"].reverse()
-    for year in aggregations["jaar_goedkeuring"]["buckets"]:
+    for year in aggregations.get("jaar_goedkeuring", {}).get("buckets", []):
         year["key"] = year["key_as_string"]
     return aggregations
@@ -0,0 +1,26 @@
+from elasticsearch8 import Elasticsearch
+
+
+def count_hits(
+    es: Elasticsearch,
+    index: str,
+    query: dict,
+    track_total_hits: int | bool = 10000,
+) -> tuple[int, str]:
+    """
+    Count the documents matching a query without fetching or scoring hits.
+
+    A size=0 search instead of _count, so the count can be capped: ES stops
+    counting at track_total_hits and reports the relation as "gte".
+
+    :param track_total_hits: cap of the count, True for an exact count
+    :return: the total and its relation, "eq" or "gte"
+    """
+    result = es.search(
+        index=index,
+        query=query,
+        size=0,
+        track_total_hits=track_total_hits,
+    )
+    total = result["hits"]["total"]
+    return total["value"], total["relation"]
@@ -0,0 +1,77 @@
+import json
+import re
+
+from shapely import wkt
+from shapely.errors import ShapelyError
+from shapely.geometry import mapping
+from shapely.geometry import shape
+
+AFSTAND_REGEX = re.compile(r"^\d+(\.\d+)?(m|km)?$")
+
+
+def _coordinaten(value: str, aantal: int) -> list[float]:
+    try:
+        coordinaten = [float(part) for part in value.split(",")]
+    except ValueError:
+        raise ValueError(f"Ongeldige coördinaten: {value}")
+    if len(coordinaten) != aantal:
+        raise ValueError(f"Verwacht {aantal} komma-gescheiden waarden: {value}")
+    return coordinaten
+
+
+def _check_punt(lon: float, lat: float) -> None:
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        raise ValueError(f"Coördinaat buiten WGS 84: {lon},{lat}")
+
+
+def parse_bbox(value: str) -> dict:
+    """
+    Zet een bbox minx,miny,maxx,maxy (WGS 84) om naar een envelope
+    zoals een geo_shape query die verwacht.
+    """
+    minx, miny, maxx, maxy = _coordinaten(value, 4)
+    _check_punt(minx, miny)
+    _check_punt(maxx, maxy)
+    if minx > maxx or miny > maxy:
+        raise ValueError(f"Ongeldige bbox, min groter dan max: {value}")
+    return {"type": "envelope", "coordinates": [[minx, maxy], [maxx, miny]]}
+
+
+def parse_geometrie(value: str) -> dict:
+    """
+    Zet een geometrie als GeoJSON (geometrie of feature) of WKT, in WGS 84,
+    om naar een GeoJSON geometrie.
+    """
+    try:
+        if value.lstrip().startswith("{"):
+            geojson = json.loads(value)
+            geojson = geojson.get("geometry", geojson)
+            geometrie = shape(geojson)
+        else:
+            geometrie = wkt.loads(value)
+    except (ValueError, TypeError, AttributeError, KeyError, ShapelyError):
+        raise ValueError("Ongeldige geometrie, verwacht GeoJSON of WKT")
+    if geometrie.is_empty:
+        raise ValueError("Lege geometrie")
+    minx, miny, maxx, maxy = geometrie.bounds
+    _check_punt(minx, miny)
+    _check_punt(maxx, maxy)
+    return mapping(geometrie)
+
+
+def parse_afstand(value: str) -> dict:
+    """
+    Zet lon,lat,afstand om naar het punt en de afstand van een geo_distance
+    query. De afstand is in meter, tenzij de eenheid (m of km) erbij staat.
+    """
+    try:
+        lon, lat, afstand = (part.strip() for part in value.split(","))
+        lon, lat = float(lon), float(lat)
+    except ValueError:
+        raise ValueError(f"Verwacht lon,lat,afstand: {value}")
+    _check_punt(lon, lat)
+    if not AFSTAND_REGEX.match(afstand):
+        raise ValueError(f"Ongeldige afstand: {afstand}")
+    if afstand[-1].isdigit():
+        afstand += "m"
+    return {"punt": {"lon": lon, "lat": lat}, "afstand": afstand}
@@ -8,7 +8,10 @@ from typing import Any
 from typing import Mapping
 
 import httpx
+from elasticsearch8 import ApiError
+from elasticsearch8 import Elasticsearch
 from elasticsearch8 import NotFoundError
+from elasticsearch8 import TransportError
 from fastapi import FastAPI
 from geojson import mapping
 from oe_geoutils.utils import convert_geojson_to_geometry
@@ -20,12 +23,18 @@ from oe_utils.search.searchengine import SearchEngine
 from oe_utils.utils.db_utils import db_session
 from oeauth.openid import OpenIDHelper
 from pytz import timezone
+from redis import Redis
+from redis.exceptions import RedisError
 from skosprovider.registry import Registry
 
+from app.cache.search import bump_index_generation
 from app.core.config import Settings as AppSettings
 from app.core.config import get_settings
 from app.models import Plan
 from app.search.indexer import Indexer
+from app.search.mapping.plannen import geometrie_detail_toleranties
+from app.search.zoekopdrachten import bewaar_treffers
+from app.search.zoekopdrachten import percoleer
 from app.skos import fill_registry
 
 log = logging.getLogger(__name__)
@@ -246,20 +255,55 @@ def beheersplan_to_es_dict(beheersplan, open_id_helper, skos_registry):
     if beheersplan.geometrie is not None:
         geo_json = convert_wktelement_to_geojson(beheersplan.geometrie)
         data["geometrie"] = transform_contour_to_wsg84(geo_json)
+        data["geometrie_vereenvoudigd"] = simplify_contour_to_wsg84(geo_json)
+        data["geometrie_centroid"] = centroid_wsg84(data["geometrie"])
+        data["geometrie_bbox"] = envelope_wsg84(data["geometrie"])
     return data
 
 
-def transform_contour_to_wsg84(contour):
-    shape = convert_geojson_to_geometry(contour)
+def _transform_shape_to_wsg84(shape, srid):
     shape = transform_projection(
         shape,
-        epsg(get_srid_from_geojson(contour), True),
+        epsg(srid, True),
         epsg(4326, True),  # WSG 84
     )
     shape = shape.buffer(0)
     return mapping.to_mapping(shape)
 
 
+def transform_contour_to_wsg84(contour):
+    shape = convert_geojson_to_geometry(contour)
+    return _transform_shape_to_wsg84(shape, get_srid_from_geojson(contour))
+
+
+def centroid_wsg84(contour):
+    """Zwaartepunt van een WSG 84 contour als geo_point."""
+    centroid = convert_geojson_to_geometry(contour).centroid
+    return {"lat": centroid.y, "lon": centroid.x}
+
+
+def envelope_wsg84(contour):
+    """Omhullende rechthoek van een WSG 84 contour als ES envelope."""
+    minlon, minlat, maxlon, maxlat = convert_geojson_to_geometry(contour).bounds
+    return {"type": "envelope", "coordinates": [[minlon, maxlat], [maxlon, minlat]]}
+
+
+def simplify_contour_to_wsg84(contour):
+    """
+    Vereenvoudig een contour voor elk detailniveau.
+    Er wordt vereenvoudigd in de oorspronkelijke projectie (Lambert72), zodat
+    de toleranties in meter zijn, en pas daarna omgezet naar WSG 84.
+    """
+    shape = convert_geojson_to_geometry(contour)
+    srid = get_srid_from_geojson(contour)
+    return {
+        detail: _transform_shape_to_wsg84(
+            shape.simplify(tolerantie, preserve_topology=True), srid
+        )
+        for detail, tolerantie in geometrie_detail_toleranties.items()
+    }
+
+
 def index_beheersplan(
     searchengine,
     session,
@@ -277,6 +321,7 @@ def index_beheersplan(
         beheersplan, open_id_helper, skos_registry
     )
     searchengine.add_to_index(beheersplan.id, json.dumps(beheersplan_json))
+    return beheersplan_json
 
 
 def delete_beheersplan_from_index(search_engine, _id):
@@ -307,8 +352,9 @@ def index_operation(index_new, index_dirty, index_deleted, settings):
             api_key=prepared_settings.get("ELASTICSEARCH_API_KEY"),
         )
         open_id_helper = _create_openid_helper(prepared_settings)
+        geindexeerd = []
         for n in itertools.chain(index_new, index_dirty):
-            index_beheersplan(
+            beheersplan_json = index_beheersplan(
                 search_engine,
                 dbsession,
                 n,
@@ -316,8 +362,62 @@ def index_operation(index_new, index_dirty, index_deleted, settings):
                 skos_registry,
                 prepared_settings,
             )
+            if beheersplan_json is not None:
+                geindexeerd.append(beheersplan_json)
         for d in index_deleted:
             delete_beheersplan_from_index(search_engine, d)
+    # Eerst zichtbaar maken, anders cachet een zoekopdracht in het refresh
+    # interval de oude documenten onder de nieuwe generatie
+    refresh_index(prepared_settings)
+    expire_search_caches(prepared_settings)
+    percoleer_zoekopdrachten(prepared_settings, geindexeerd)
+
+
+def refresh_index(settings):
+    """Maak de gewijzigde plannen meteen zichtbaar voor zoekopdrachten."""
+    try:
+        with Elasticsearch(
+            settings["ELASTICSEARCH_URL"], api_key=settings.get("ELASTICSEARCH_API_KEY")
+        ) as es:
+            es.indices.refresh(index=settings["SEARCHENGINE.INDEX"])
+    except (ApiError, TransportError):
+        log.exception("De index kon niet ververst worden.")
+
+
+def expire_search_caches(settings):
+    """Start een nieuwe index generatie, zodat gecachte zoekresultaten vervallen."""
+    redis_url = settings.get("REDIS_SESSIONS_URL")
+    if not redis_url:
+        return
+    try:
+        with Redis.from_url(redis_url) as redis:
+            bump_index_generation(redis)
+    except RedisError:
+        log.exception("De gecachte zoekresultaten konden niet vervallen worden.")
+
+
+def percoleer_zoekopdrachten(settings, plannen):
+    """
+    Percoleer de nieuwe en gewijzigde plannen op de bewaarde zoekopdrachten en
+    bewaar per zoekopdracht de plannen die er aan voldoen.
+    """
+    redis_url = settings.get("REDIS_SESSIONS_URL")
+    if not plannen or not redis_url:
+        return
+    try:
+        with Elasticsearch(
+            settings["ELASTICSEARCH_URL"], api_key=settings.get("ELASTICSEARCH_API_KEY")
+        ) as es:
+            treffers = percoleer(es, settings["SEARCHENGINE.INDEX"], plannen)
+        with Redis.from_url(redis_url) as redis:
+            bewaar_treffers(
+                redis,
+                treffers,
+                ttl=settings.get("ZOEKOPDRACHT_TREFFERS_TTL", 30 * 86400),
+                max_treffers=settings.get("ZOEKOPDRACHT_MAX_TREFFERS", 1000),
+            )
+    except (ApiError, TransportError, RedisError):
+        log.exception("De bewaarde zoekopdrachten konden niet gepercoleerd worden.")
 
 
 def setup_indexer(
@@ -1,6 +1,7 @@
 import itertools as it
 import logging
 import uuid
+from functools import partial
 
 from oe_utils.jobs import queue_job
 from oe_utils.search.searchengine import SearchEngine
@@ -12,6 +13,10 @@ from sqlalchemy.orm import object_session
 
 log = logging.getLogger()
 
+# Key in session.info: when it holds a list, the invalidation listeners are not
+# run on commit but appended to it, for the caller to run off the event loop
+DEFERRED_INVALIDATIONS = "deferred_invalidations"
+
 
 class IndexingWorker:
     def __init__(self, db_class, search_engine: SearchEngine, settings):
@@ -107,6 +112,7 @@ class Indexer:
         self.cls_name = cls.__name__
         self.index_attachments = index_attachments
         self.items_per_job = max_items_per_job
+        self.invalidation_listeners = []
 
     def _register_event_listeners(self, cls):
         """
@@ -130,6 +136,36 @@ class Indexer:
     def _delete_listener(mapper, connection, target):
         _add_to_session_list(target, operation="REMOVE")
 
+    def add_invalidation_listener(self, listener):
+        """
+        Register a callable that is notified of the changed ids on every commit.
+
+        :param listener: callable that receives a set of added, changed and
+            deleted ids of the indexed class
+        """
+        self.invalidation_listeners.append(listener)
+
+    def notify_invalidation_listeners(self, session):
+        changed = (
+            session.index_new[self.cls_name]
+            | session.index_dirty[self.cls_name]
+            | session.index_deleted[self.cls_name]
+        )
+        if not changed:
+            return
+        deferred = session.info.get(DEFERRED_INVALIDATIONS)
+        if deferred is not None:
+            deferred.append(partial(self.run_invalidation_listeners, set(changed)))
+            return
+        self.run_invalidation_listeners(changed)
+
+    def run_invalidation_listeners(self, changed):
+        for listener in self.invalidation_listeners:
+            try:
+                listener(set(changed))
+            except Exception:
+                log.exception("Invalidation listener %s failed.", listener)
+
     def register_session(self, session, redis=None):
         session.redis = redis
         session.index_new = session.index_new if hasattr(session, "index_new") else {}
@@ -171,6 +207,7 @@ class Indexer:
                 if self.index_attachments:
                     index_args.append(True)
                 self.index_operation(*index_args)
+            self.notify_invalidation_listeners(session)
             session.index_new[self.cls_name].clear()
             session.index_dirty[self.cls_name].clear()
             session.index_deleted[self.cls_name].clear()
@@ -1,12 +1,53 @@
+# Vereenvoudigde geometrieën die naast de volledige geometrie geïndexeerd worden,
+# met hun tolerantie in meter (Lambert72)
+GEOMETRIE_VOLLEDIG = "volledig"
+geometrie_detail_toleranties = {"midden": 5, "laag": 50}
+
+# Standaard sortering van de lijst; de index is er op gesorteerd, zodat ES
+# kan stoppen na de gevraagde pagina als het totaal niet nodig is
+INDEX_SORT_FIELD = "onderwerp.raw"
+
+# Velden waarop tekst= zoekt: zoektekst verzamelt via copy_to alle tekstvelden,
+# het onderwerp weegt daarbovenop zwaarder door
+ZOEKTEKST_FIELD = "zoektekst"
+zoektekst_boosts = [{"onderwerp": 3}, {ZOEKTEKST_FIELD: 1}]
+
 beheersplannen_index = {
     "settings": {
-        "index": {"codec": "best_compression"},
+        "index": {
+            "codec": "best_compression",
+            "sort.field": INDEX_SORT_FIELD,
+            "sort.order": "asc",
+        },
         "analysis": {
             "analyzer": {
                 "string_lowercase": {
                     "type": "custom",
                     "tokenizer": "keyword",
                     "filter": ["lowercase"],
+                },
+                # Indexeert elk woord van het onderwerp met al zijn prefixen
+                "onderwerp_suggest": {
+                    "type": "custom",
+                    "tokenizer": "standard",
+                    "filter": ["lowercase", "asciifolding", "suggest_edge_ngram"],
+                },
+                "onderwerp_suggest_search": {
+                    "type": "custom",
+                    "tokenizer": "standard",
+                    "filter": ["lowercase", "asciifolding"],
+                },
+                "zoektekst": {
+                    "type": "custom",
+                    "tokenizer": "standard",
+                    "filter": ["lowercase", "asciifolding"],
+                },
+            },
+            "filter": {
+                "suggest_edge_ngram": {
+                    "type": "edge_ngram",
+                    "min_gram": 1,
+                    "max_gram": 20,
                 }
             },
             "normalizer": {
@@ -23,15 +64,25 @@ beheersplannen_index = {
 beheersplannen_mapping = {
     "properties": {
         "id": {"type": "integer"},
+        ZOEKTEKST_FIELD: {"type": "text", "analyzer": "zoektekst"},
         "onderwerp": {
             "type": "text",
-            "fields": {"raw": {"type": "keyword", "normalizer": "keyword_lowercase"}},
+            "copy_to": ZOEKTEKST_FIELD,
+            "fields": {
+                "raw": {"type": "keyword", "normalizer": "keyword_lowercase"},
+                "suggest": {
+                    "type": "text",
+                    "analyzer": "onderwerp_suggest",
+                    "search_analyzer": "onderwerp_suggest_search",
+                },
+            },
         },
         "aanduidingsobjecttypes": {
             "properties": {
                 "id": {"type": "long"},
                 "naam": {
                     "type": "text",
+                    "copy_to": ZOEKTEKST_FIELD,
                     "fields": {
                         "keyword": {
                             "type": "keyword",
@@ -50,6 +101,11 @@ beheersplannen_mapping = {
         "datum_goedkeuring": {"type": "date", "format": "date"},
         "beheerscommissie": {"type": "boolean"},
         "geometrie": {"type": "geo_shape"},
+        # Punt en omhullende rechthoek per plan, voor clusters en kaartmarkers
+        "geometrie_centroid": {"type": "geo_point"},
+        "geometrie_bbox": {"type": "geo_shape"},
+        # Enkel om terug te geven, niet om op te zoeken
+        "geometrie_vereenvoudigd": {"type": "object", "enabled": False},
         "erfgoedobjecten": {"type": "keyword"},
         "plantype": {
             "type": "keyword",
@@ -57,6 +113,7 @@ beheersplannen_mapping = {
         },
         "plantype_naam": {
             "type": "keyword",
+            "copy_to": ZOEKTEKST_FIELD,
             "fields": {"lower": {"type": "keyword", "normalizer": "keyword_lowercase"}},
         },
         "acls": {"type": "keyword", "normalizer": "keyword_lowercase"},
@@ -68,6 +125,7 @@ beheersplannen_mapping = {
                 "id": {"type": "long"},
                 "naam": {
                     "type": "keyword",
+                    "copy_to": ZOEKTEKST_FIELD,
                     "fields": {
                         "lower": {"type": "keyword", "normalizer": "keyword_lowercase"}
                     },
@@ -79,6 +137,7 @@ beheersplannen_mapping = {
             "properties": {
                 "naam": {
                     "type": "keyword",
+                    "copy_to": ZOEKTEKST_FIELD,
                     "fields": {
                         "lower": {"type": "keyword", "normalizer": "keyword_lowercase"}
                     },
@@ -100,30 +159,183 @@ beheersplannen_mapping = {
 }
 
 
-def map_es_beheersplannen_result(self_url, result, settings):
-    _uri = settings.PLANNEN_URI
-    plannen = []
-    for h in result["hits"]["hits"]:
-        data = h["_source"]
-        plannen.append(
-            {
-                "id": data["id"],
-                "uri": _uri.format(id=data["id"]),
-                "self": str(self_url).format(id=data["id"]),
-                "onderwerp": data.get("onderwerp", ""),
-                "startdatum": data.get("startdatum", ""),
-                "einddatum": data.get("einddatum", ""),
-                "datum_goedkeuring": data.get("datum_goedkeuring", ""),
-                "beheerscommissie": data.get("beheerscommissie", ""),
-                "geometrie": data.get("geometrie", ""),
-                "plantype": data.get("plantype", ""),
-                "plantype_naam": data.get("plantype_naam", ""),
-                "bestanden": data.get("bestanden", ""),
-                "erfgoedobjecten": data.get("erfgoedobjecten", ""),
-                "primair_bestand": data.get("primair_bestand"),
-                "systemfields": data.get("systemfields"),
-                "status": data.get("status"),
-                "actief": data.get("status", {}).get("actief"),
-            }
-        )
-    return plannen
+def beheersplannen_create_body():
+    """
+    Settings en mapping om de index in een keer aan te maken.
+    ES controleert index.sort bij het aanmaken, het sorteerveld moet dan al
+    gemapt zijn.
+    """
+    return {
+        "settings": beheersplannen_index["settings"],
+        "mappings": beheersplannen_mapping,
+    }
+
+
+def uses_index_sort(sort):
+    """Of een sort string exact de index sortering vraagt."""
+    return sort is None or sort.strip() in (INDEX_SORT_FIELD, f"+{INDEX_SORT_FIELD}")
+
+
+# _source velden die nodig zijn voor elk veld van PlanListResponse
+beheersplannen_source_fields = {
+    "id": ["id"],
+    "uri": ["id"],
+    "self": ["id"],
+    "onderwerp": ["onderwerp"],
+    "startdatum": ["startdatum"],
+    "einddatum": ["einddatum"],
+    "datum_goedkeuring": ["datum_goedkeuring"],
+    "beheerscommissie": ["beheerscommissie"],
+    "geometrie": ["geometrie"],
+    "plantype": ["plantype"],
+    "plantype_naam": ["plantype_naam"],
+    "bestanden": ["bestanden"],
+    "erfgoedobjecten": ["erfgoedobjecten"],
+    "primair_bestand": ["primair_bestand"],
+    "systemfields": ["systemfields"],
+    "status": ["status"],
+    "actief": ["status.actief"],
+    "geometrie_centroid": ["geometrie_centroid"],
+    "geometrie_bbox": ["geometrie_bbox"],
+}
+
+# Velden die enkel met velden= opgehaald worden
+geometrie_afgeleide_velden = ["geometrie_bbox", "geometrie_centroid"]
+
+
+def velden_to_source(velden):
+    """ES _source includes for a list of PlanListResponse velden."""
+    source = {"id"}
+    for veld in velden:
+        source.update(beheersplannen_source_fields[veld])
+    return sorted(source)
+
+
+def _geometrie_source_field(geometrie_detail):
+    if geometrie_detail in (None, GEOMETRIE_VOLLEDIG):
+        return "geometrie"
+    return f"geometrie_vereenvoudigd.{geometrie_detail}"
+
+
+def beheersplannen_source(velden=None, geometrie_detail=None):
+    """
+    ES _source filter for the list endpoints.
+    Only the geometrie at the asked level of detail is fetched.
+    """
+    geometrie = _geometrie_source_field(geometrie_detail)
+    if velden:
+        source = velden_to_source(velden)
+        if "geometrie" in source:
+            source.remove("geometrie")
+            source.append(geometrie)
+        return sorted(source)
+    if geometrie == "geometrie":
+        return {"excludes": geometrie_afgeleide_velden + ["geometrie_vereenvoudigd"]}
+    return {
+        "excludes": geometrie_afgeleide_velden
+        + ["geometrie"]
+        + [
+            _geometrie_source_field(detail)
+            for detail in geometrie_detail_toleranties
+            if detail != geometrie_detail
+        ]
+    }
+
+
+def _get_geometrie(data, geometrie_detail):
+    if geometrie_detail in (None, GEOMETRIE_VOLLEDIG):
+        return data.get("geometrie", "")
+    vereenvoudigd = data.get("geometrie_vereenvoudigd", {})
+    # Documents indexed before the variants existed only have the full geometrie
+    return vereenvoudigd.get(geometrie_detail, data.get("geometrie", ""))
+
+
+def map_es_beheersplan(self_url, data, settings, geometrie_detail=None):
+    return {
+        "id": data["id"],
+        "uri": settings.PLANNEN_URI.format(id=data["id"]),
+        "self": str(self_url).format(id=data["id"]),
+        "onderwerp": data.get("onderwerp", ""),
+        "startdatum": data.get("startdatum", ""),
+        "einddatum": data.get("einddatum", ""),
+        "datum_goedkeuring": data.get("datum_goedkeuring", ""),
+        "beheerscommissie": data.get("beheerscommissie", ""),
+        "geometrie": _get_geometrie(data, geometrie_detail),
+        "plantype": data.get("plantype", ""),
+        "plantype_naam": data.get("plantype_naam", ""),
+        "bestanden": data.get("bestanden", ""),
+        "erfgoedobjecten": data.get("erfgoedobjecten", ""),
+        "primair_bestand": data.get("primair_bestand"),
+        "systemfields": data.get("systemfields"),
+        "status": data.get("status"),
+        "actief": data.get("status", {}).get("actief"),
+    }
+
+
+def map_es_beheersplannen_result(self_url, result, settings, geometrie_detail=None):
+    return [
+        map_es_beheersplan(self_url, h["_source"], settings, geometrie_detail)
+        for h in result["hits"]["hits"]
+    ]
+
+
+def map_es_beheersplannen_sparse_result(
+    self_url, velden, result, settings, geometrie_detail=None
+):
+    """Like map_es_beheersplannen_result, but only with the given velden."""
+    velden = {"id", *velden}
+    return [
+        {
+            veld: waarde
+            for veld, waarde in {
+                **map_es_beheersplan(
+                    self_url, h["_source"], settings, geometrie_detail
+                ),
+                "geometrie_centroid": h["_source"].get("geometrie_centroid"),
+                "geometrie_bbox": h["_source"].get("geometrie_bbox"),
+            }.items()
+            if veld in velden
+        }
+        for h in result["hits"]["hits"]
+    ]
+
+
+def suggesties_query(q):
+    """Plannen waarvan elk woord van q het begin van een woord in het onderwerp is."""
+    return {"match": {"onderwerp.suggest": {"query": q, "operator": "and"}}}
+
+
+def map_es_suggesties(self_url, result):
+    return [
+        {
+            "id": h["_source"]["id"],
+            "onderwerp": h["_source"].get("onderwerp", ""),
+            "self": str(self_url).format(id=h["_source"]["id"]),
+        }
+        for h in result["hits"]["hits"]
+    ]
+
+
+def clusters_aggregation(precisie):
+    """Plannen per geotile cel van de gegeven precisie, met hun zwaartepunt."""
+    return {
+        "clusters": {
+            "geotile_grid": {
+                "field": "geometrie_centroid",
+                "precision": precisie,
+                "size": 10000,
+            },
+            "aggs": {"centroid": {"geo_centroid": {"field": "geometrie_centroid"}}},
+        }
+    }
+
+
+def map_es_clusters(result):
+    return [
+        {
+            "cel": bucket["key"],
+            "aantal": bucket["doc_count"],
+            "centroid": bucket["centroid"]["location"],
+        }
+        for bucket in result["aggregations"]["clusters"]["buckets"]
+    ]
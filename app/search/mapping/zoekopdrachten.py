@@ -0,0 +1,23 @@
+from app.search.mapping.plannen import beheersplannen_index
+from app.search.mapping.plannen import beheersplannen_mapping
+
+# Bewaarde zoekopdrachten worden uitgevoerd op plan documenten, dus de
+# percolator index kent dezelfde analyse en velden als de plannen index
+zoekopdrachten_index = {
+    "settings": {"analysis": beheersplannen_index["settings"]["analysis"]}
+}
+
+zoekopdrachten_mapping = {
+    "properties": {
+        **beheersplannen_mapping["properties"],
+        "query": {"type": "percolator"},
+        "naam": {"type": "text"},
+        # De filters waaruit de query gebouwd werd, enkel om terug te geven
+        "filters": {"type": "object", "enabled": False},
+        "aangemaakt": {"type": "date", "format": "date_optional_time"},
+    }
+}
+
+
+def zoekopdrachten_index_name(index):
+    return f"{index}_zoekopdrachten"
@@ -0,0 +1,759 @@
+"""
+In-process stand-in for the plannen index, for tests and benchmarks.
+
+InMemorySearchEngine keeps the documents in a dict and evaluates the part of
+the query DSL that PlannenQueryBuilder and the routes emit: bool, match_all,
+term(s), match, prefix, range, exists, ids, simple_query_string and
+multi_match queries, sort, from/size, _source filtering and terms and
+date_histogram aggregations. Fields are analyzed as beheersplannen_mapping
+prescribes, including copy_to, normalizers and multi-fields.
+
+It offers both the SearchEngine methods and the Elasticsearch client search,
+so it can stand in for get_searchengine and get_es_client at once, which the
+app does with SEARCH_BACKEND=memory. Anything else raises UnsupportedSearch,
+which the app answers with a 501, so these routes are unavailable in that mode:
+
+- the list, facetten, tellingen and clusters with geo filters (bbox,
+  intersecteert, binnen_afstand): geo queries;
+- cursor paging of the list: search_after on a point in time;
+- clusters: the geotile_grid aggregation;
+- zoekopdrachten: get, index and delete on the zoekopdrachten index, and the
+  percolate query that matches them with plannen.
+
+The indexer still sends its jobs to the worker, which indexes in
+Elasticsearch: changes made through the API don't show up here. Fill this
+engine with bulk_add_to_index, or at startup from the NDJSON file in
+SEARCH_MEMORY_DOCUMENTS, as written by initialize_plannen_es --ndjson.
+"""
+
+import itertools
+import json
+import re
+import unicodedata
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import date
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from typing import Callable
+
+from app.search.mapping.plannen import beheersplannen_mapping
+
+# Normalizers of the keyword fields, by name in the mapping
+_NORMALIZERS: dict[str | None, Callable[[str], str]] = {
+    None: lambda value: value,
+    "keyword_lowercase": str.lower,
+}
+_INDEXED_TYPES = {"text", "keyword", "date", "integer", "long", "boolean"}
+_FORMATS = {"yyyy": "%Y", "MM": "%m", "dd": "%d"}
+
+
+def _fold(text: str) -> str:
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+
+
+def _standard(text: str) -> list[str]:
+    return re.findall(r"\w+", str(text).lower())
+
+
+def _folded(text: str) -> list[str]:
+    return _standard(_fold(str(text)))
+
+
+def _edge_ngrams(text: str) -> list[str]:
+    return [
+        token[:n] for token in _folded(text) for n in range(1, min(len(token), 20) + 1)
+    ]
+
+
+_ANALYZERS: dict[str | None, Callable[[str], list[str]]] = {
+    None: _standard,
+    "standard": _standard,
+    "zoektekst": _folded,
+    "onderwerp_suggest": _edge_ngrams,
+    "onderwerp_suggest_search": _folded,
+    "string_lowercase": lambda text: [str(text).lower()],
+}
+
+
+@dataclass
+class _Field:
+    type: str
+    source: str
+    analyzer: str | None = None
+    search_analyzer: str | None = None
+    normalizer: str | None = None
+    copy_from: list[str] = field(default_factory=list)
+
+
+def _mapped_fields(properties: dict, prefix: str = "") -> dict[str, _Field]:
+    fields = {}
+    for naam, definitie in properties.items():
+        path = f"{prefix}{naam}"
+        if "properties" in definitie:
+            fields.update(_mapped_fields(definitie["properties"], f"{path}."))
+            continue
+        fields[path] = _Field(
+            type=definitie.get("type", "object"),
+            source=path,
+            analyzer=definitie.get("analyzer"),
+            search_analyzer=definitie.get("search_analyzer"),
+            normalizer=definitie.get("normalizer"),
+        )
+        for sub, sub_definitie in definitie.get("fields", {}).items():
+            fields[f"{path}.{sub}"] = _Field(
+                type=sub_definitie["type"],
+                source=path,
+                analyzer=sub_definitie.get("analyzer"),
+                search_analyzer=sub_definitie.get("search_analyzer"),
+                normalizer=sub_definitie.get("normalizer"),
+            )
+    return fields
+
+
+def _copy_to(properties: dict, prefix: str = ""):
+    for naam, definitie in properties.items():
+        if "properties" in definitie:
+            yield from _copy_to(definitie["properties"], f"{prefix}{naam}.")
+        elif "copy_to" in definitie:
+            yield f"{prefix}{naam}", definitie["copy_to"]
+
+
+def _fields_from_mapping(properties: dict) -> dict[str, _Field]:
+    """The indexed fields and multi-fields of a mapping by their full path."""
+    fields = _mapped_fields(properties)
+    for naam, doel in _copy_to(properties):
+        fields[doel].copy_from.append(naam)
+    return fields
+
+
+def _source_values(source: dict, path: str) -> list:
+    values = [source]
+    for part in path.split("."):
+        volgende = []
+        for value in values:
+            if isinstance(value, dict) and value.get(part) is not None:
+                child = value[part]
+                volgende.extend(child if isinstance(child, list) else [child])
+        values = volgende
+    return values
+
+
+def _to_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        moment = value
+    elif isinstance(value, date):
+        moment = datetime(value.year, value.month, value.day)
+    else:
+        moment = datetime.fromisoformat(str(value))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.lower() == "true"
+    return bool(value)
+
+
+def _java_format(moment: datetime, fmt: str) -> str:
+    for java, python in _FORMATS.items():
+        fmt = fmt.replace(java, python)
+    return moment.strftime(fmt)
+
+
+def _split_boost(veld) -> tuple[str, float]:
+    if isinstance(veld, dict):
+        ((naam, boost),) = veld.items()
+        return naam, float(boost)
+    naam, _, boost = veld.partition("^")
+    return naam, float(boost or 1)
+
+
+class UnsupportedSearch(NotImplementedError):
+    """A query, aggregation or client call the in-memory engine doesn't offer."""
+
+    def __init__(self, onderdeel: str):
+        super().__init__(
+            f"{onderdeel} wordt niet ondersteund door de in-memory zoekmachine "
+            "(SEARCH_BACKEND=memory)"
+        )
+
+
+@dataclass
+class QueryResult:
+    """What SearchEngine.query returns: the mapped hits and the raw result."""
+
+    data: list
+    count: int
+    aggregations: dict
+    result: dict
+
+
+class InMemorySearchEngine:
+    def __init__(self, mapping: dict | None = None):
+        mapping = mapping or beheersplannen_mapping
+        self.fields = _fields_from_mapping(mapping["properties"])
+        self._sources: dict[str, dict] = {}
+        self._indexed: dict[str, dict[str, list]] = {}
+
+    # SearchEngine ------------------------------------------------------------
+
+    def add_to_index(self, object_id, object_data) -> None:
+        if isinstance(object_data, (str, bytes)):
+            object_data = json.loads(object_data)
+        self._sources[str(object_id)] = object_data
+        self._indexed[str(object_id)] = self._index_document(object_data)
+
+    def bulk_add_to_index(self, objects) -> None:
+        for object_data in objects:
+            self.add_to_index(object_data["id"], object_data)
+
+    def load_ndjson(self, path) -> int:
+        """Index the documents of an NDJSON file, one _source per line."""
+        with open(path, encoding="utf-8") as bestand:
+            documents = [json.loads(line) for line in bestand if line.strip()]
+        self.bulk_add_to_index(documents)
+        return len(documents)
+
+    def remove_from_index(self, object_id) -> None:
+        self._sources.pop(str(object_id), None)
+        self._indexed.pop(str(object_id), None)
+
+    def remove_from_index_by_query(self, field_name, value) -> None:
+        for object_id, source in list(self._sources.items()):
+            if value in _source_values(source, field_name):
+                self.remove_from_index(object_id)
+
+    def remove_index(self) -> None:
+        self._sources.clear()
+        self._indexed.clear()
+
+    def create_index(self, data=None) -> None:
+        pass
+
+    def add_mapping(self, mapping) -> None:
+        self.fields = _fields_from_mapping(mapping["properties"])
+        for object_id, source in self._sources.items():
+            self._indexed[object_id] = self._index_document(source)
+
+    def query(
+        self,
+        query_params: dict | None = None,
+        sort=None,
+        settings=None,
+        load_searchquery_param_func=None,
+        mapper=None,
+        mapper_args=None,
+        source=None,
+        aggregations=None,
+        **kwargs,
+    ) -> QueryResult:
+        query_params = query_params or {}
+        query = (
+            load_searchquery_param_func(query_params, settings)
+            if load_searchquery_param_func is not None
+            else {"match_all": {}}
+        )
+        size = query_params.get("per_pagina", 10)
+        result = self.search(
+            query=query,
+            sort=sort,
+            from_=(query_params.get("pagina", 1) - 1) * size,
+            size=size,
+            source=source,
+            aggregations=aggregations,
+        )
+        data = (
+            mapper(*(mapper_args or []), result, settings)
+            if mapper is not None
+            else [hit["_source"] for hit in result["hits"]["hits"]]
+        )
+        return QueryResult(
+            data=data,
+            count=result["hits"]["total"]["value"],
+            aggregations=result.get("aggregations", {}),
+            result=result,
+        )
+
+    # Elasticsearch client ----------------------------------------------------
+
+    def options(self, **kwargs) -> "InMemorySearchEngine":
+        return self
+
+    def close(self) -> None:
+        pass
+
+    def get(self, index=None, id=None, **kwargs) -> dict:
+        raise UnsupportedSearch("get")
+
+    def index(self, index=None, id=None, document=None, **kwargs) -> dict:
+        raise UnsupportedSearch("index")
+
+    def delete(self, index=None, id=None, **kwargs) -> dict:
+        raise UnsupportedSearch("delete")
+
+    def open_point_in_time(self, index=None, keep_alive=None, **kwargs) -> dict:
+        raise UnsupportedSearch("point in time")
+
+    def count(self, index=None, query=None, **kwargs) -> dict:
+        return {"count": len(self._matching(query))}
+
+    def search(
+        self,
+        index=None,
+        query=None,
+        body=None,
+        sort=None,
+        size=10,
+        from_=0,
+        source=None,
+        aggregations=None,
+        aggs=None,
+        track_total_hits=10000,
+        search_after=None,
+        pit=None,
+        **kwargs,
+    ) -> dict:
+        if search_after is not None or pit is not None:
+            raise UnsupportedSearch("search_after en point in time")
+        if body is not None:
+            query = body.get("query", query)
+            sort = body.get("sort", sort)
+            size = body.get("size", size)
+            from_ = body.get("from", from_)
+            source = body.get("_source", source)
+            aggregations = body.get("aggs", body.get("aggregations", aggregations))
+        source = kwargs.get("_source", source)
+        aggregations = aggregations or aggs
+        matching = self._matching(query)
+        hits = self._sorted(matching, sort)
+        total = len(hits)
+        result = {
+            "hits": {
+                "total": self._total(total, track_total_hits),
+                "max_score": max((score for _, score in hits), default=None),
+                "hits": [
+                    {
+                        "_id": object_id,
+                        "_score": score,
+                        "_source": self._filter_source(
+                            self._sources[object_id], source
+                        ),
+                    }
+                    for object_id, score in hits[from_ : from_ + size]
+                ],
+            }
+        }
+        if aggregations:
+            ids = [object_id for object_id, _ in hits]
+            result["aggregations"] = {
+                naam: self._aggregate(ids, agg) for naam, agg in aggregations.items()
+            }
+        return result
+
+    # Indexing ----------------------------------------------------------------
+
+    def _field(self, naam: str) -> _Field:
+        # Unmapped fields behave like dynamically mapped keywords
+        return self.fields.get(naam) or _Field(type="keyword", source=naam)
+
+    def _index_value(self, veld: _Field, value):
+        if veld.type == "keyword":
+            return _NORMALIZERS[veld.normalizer](str(value))
+        if veld.type == "date":
+            return _to_datetime(value)
+        if veld.type in ("integer", "long"):
+            return int(value)
+        if veld.type == "boolean":
+            return _to_bool(value)
+        return value
+
+    def _index_document(self, source: dict) -> dict[str, list]:
+        indexed = {}
+        for naam, veld in self.fields.items():
+            if veld.type not in _INDEXED_TYPES:
+                continue
+            bronnen = [veld.source, *veld.copy_from]
+            values = list(
+                itertools.chain.from_iterable(
+                    _source_values(source, bron) for bron in bronnen
+                )
+            )
+            if veld.type == "text":
+                analyzer = _ANALYZERS[veld.analyzer]
+                indexed[naam] = [token for value in values for token in analyzer(value)]
+            else:
+                indexed[naam] = [self._index_value(veld, value) for value in values]
+        return indexed
+
+    def _values(self, object_id: str, naam: str) -> list:
+        indexed = self._indexed[object_id]
+        if naam in indexed:
+            return indexed[naam]
+        veld = self._field(naam)
+        return [
+            self._index_value(veld, value)
+            for value in _source_values(self._sources[object_id], naam)
+        ]
+
+    def _search_tokens(self, naam: str, text) -> list[str]:
+        veld = self._field(naam)
+        if veld.type != "text":
+            return [self._index_value(veld, text)]
+        return _ANALYZERS[veld.search_analyzer or veld.analyzer](text)
+
+    # Queries -----------------------------------------------------------------
+
+    def _matching(self, query) -> list[tuple[str, float]]:
+        query = query or {"match_all": {}}
+        matching = []
+        for object_id in self._sources:
+            score = self._score(object_id, query)
+            if score is not None:
+                matching.append((object_id, score))
+        return matching
+
+    def _score(self, object_id: str, query: dict) -> float | None:
+        """The score of a document for a query, None when it doesn't match."""
+        ((soort, definitie),) = query.items()
+        methode = getattr(self, f"_query_{soort}", None)
+        if methode is None:
+            raise UnsupportedSearch(f"{soort} query")
+        return methode(object_id, definitie)
+
+    def _query_match_all(self, object_id, definitie):
+        return 1.0
+
+    def _query_bool(self, object_id, definitie):
+        def clauses(key):
+            value = definitie.get(key, [])
+            return value if isinstance(value, list) else [value]
+
+        score = 0.0
+        for clause in clauses("must"):
+            clause_score = self._score(object_id, clause)
+            if clause_score is None:
+                return None
+            score += clause_score
+        for clause in clauses("filter"):
+            if self._score(object_id, clause) is None:
+                return None
+        for clause in clauses("must_not"):
+            if self._score(object_id, clause) is not None:
+                return None
+        should = [self._score(object_id, clause) for clause in clauses("should")]
+        minimum = definitie.get(
+            "minimum_should_match",
+            1 if should and not clauses("must") and not clauses("filter") else 0,
+        )
+        matched = [clause_score for clause_score in should if clause_score is not None]
+        if len(matched) < int(minimum):
+            return None
+        return score + sum(matched)
+
+    def _query_term(self, object_id, definitie):
+        ((naam, value),) = definitie.items()
+        if isinstance(value, dict):
+            value = value["value"]
+        return self._query_terms(object_id, {naam: [value]})
+
+    def _query_terms(self, object_id, definitie):
+        naam, values = next(
+            (naam, values) for naam, values in definitie.items() if naam != "boost"
+        )
+        veld = self._field(naam)
+        gezocht = {
+            value if veld.type == "text" else self._index_value(veld, value)
+            for value in values
+        }
+        return 1.0 if gezocht.intersection(self._values(object_id, naam)) else None
+
+    def _query_ids(self, object_id, definitie):
+        return 1.0 if object_id in map(str, definitie["values"]) else None
+
+    def _query_exists(self, object_id, definitie):
+        return 1.0 if self._values(object_id, definitie["field"]) else None
+
+    def _query_prefix(self, object_id, definitie):
+        ((naam, value),) = definitie.items()
+        if isinstance(value, dict):
+            value = value["value"]
+        return (
+            1.0
+            if any(
+                str(indexed).startswith(str(value))
+                for indexed in self._values(object_id, naam)
+            )
+            else None
+        )
+
+    def _query_range(self, object_id, definitie):
+        ((naam, grenzen),) = definitie.items()
+        veld = self._field(naam)
+        operators = {
+            "gte": lambda a, b: a >= b,
+            "gt": lambda a, b: a > b,
+            "lte": lambda a, b: a <= b,
+            "lt": lambda a, b: a < b,
+        }
+        checks = [
+            (operators[op], self._index_value(veld, grens))
+            for op, grens in grenzen.items()
+            if op in operators
+        ]
+        for value in self._values(object_id, naam):
+            if all(check(value, grens) for check, grens in checks):
+                return 1.0
+        return None
+
+    def _query_match(self, object_id, definitie):
+        ((naam, value),) = definitie.items()
+        operator = "or"
+        if isinstance(value, dict):
+            operator = value.get("operator", "or").lower()
+            value = value["query"]
+        return self._match_tokens(
+            object_id, naam, self._search_tokens(naam, value), operator == "and"
+        )
+
+    def _query_match_phrase(self, object_id, definitie):
+        ((naam, value),) = definitie.items()
+        if isinstance(value, dict):
+            value = value["query"]
+        return self._match_tokens(
+            object_id, naam, self._search_tokens(naam, value), True
+        )
+
+    def _match_tokens(self, object_id, naam, tokens, alle, prefix=False):
+        indexed = self._values(object_id, naam)
+
+        def gevonden(token):
+            if prefix:
+                return any(str(value).startswith(token) for value in indexed)
+            return token in indexed
+
+        treffers = sum(1 for token in tokens if gevonden(token))
+        if not tokens or not treffers or (alle and treffers < len(tokens)):
+            return None
+        return float(treffers)
+
+    def _query_multi_match(self, object_id, definitie):
+        return self._query_simple_query_string(
+            object_id,
+            {
+                "query": definitie["query"],
+                "fields": definitie.get("fields"),
+                "default_operator": definitie.get("operator", "or"),
+            },
+        )
+
+    def _query_simple_query_string(self, object_id, definitie):
+        velden = [
+            _split_boost(veld)
+            for veld in definitie.get("fields")
+            or [naam for naam, veld in self.fields.items() if veld.type == "text"]
+        ]
+        alle = definitie.get("default_operator", "or").lower() == "and"
+        score = 0.0
+        treffers = 0
+        termen = re.findall(r'-?"[^"]*"|[^\s|+()]+', definitie["query"])
+        for term in termen:
+            negatie = term.startswith("-")
+            term = term.lstrip("-").strip('"')
+            prefix = term.endswith("*")
+            term = term.rstrip("*")
+            term_score = 0.0
+            for naam, boost in velden:
+                tokens = self._search_tokens(naam, term)
+                veld_score = self._match_tokens(object_id, naam, tokens, True, prefix)
+                if veld_score is not None:
+                    term_score += boost * veld_score
+            if negatie:
+                if term_score:
+                    return None
+                continue
+            if term_score:
+                treffers += 1
+                score += term_score
+            elif alle:
+                return None
+        return score if treffers else None
+
+    # Sort, source and totals ------------------------------------------------
+
+    def _sort_keys(self, sort) -> list[tuple[str, str]]:
+        if sort is None:
+            return [("_score", "desc")]
+        if not isinstance(sort, list):
+            sort = [sort]
+        keys = []
+        for item in sort:
+            if isinstance(item, dict):
+                ((naam, order),) = item.items()
+                if isinstance(order, dict):
+                    order = order.get("order", "asc")
+            else:
+                naam, _, order = str(item).partition(":")
+            keys.append(
+                (naam, order or ("desc" if naam == "_score" else "asc"))
+            )
+        return keys
+
+    def _sorted(self, matching, sort):
+        hits = list(matching)
+        for naam, order in reversed(self._sort_keys(sort)):
+            reverse = order == "desc"
+            if naam == "_score":
+                hits.sort(key=lambda hit: hit[1], reverse=reverse)
+            elif naam != "_doc":
+                def key(hit, naam=naam, reverse=reverse):
+                    values = self._values(hit[0], naam)
+                    if not values:
+                        # Missing values sort last, in both directions
+                        return (not reverse, None)
+                    return (reverse, max(values) if reverse else min(values))
+
+                hits.sort(key=key, reverse=reverse)
+        return hits
+
+    @staticmethod
+    def _filter_source(source: dict, includes) -> dict:
+        if includes is None or includes is True:
+            return source
+        if includes is False:
+            return {}
+        excludes = []
+        if isinstance(includes, dict):
+            excludes = includes.get("excludes", [])
+            includes = includes.get("includes")
+        elif isinstance(includes, str):
+            includes = [includes]
+
+        def selected(path, patterns):
+            return any(
+                path == pattern
+                or path.startswith(f"{pattern}.")
+                or pattern.startswith(f"{path}.")
+                for pattern in patterns
+            )
+
+        def filter_dict(data, prefix=""):
+            gefilterd = {}
+            for key, value in data.items():
+                path = f"{prefix}{key}"
+                if any(path == e or path.startswith(f"{e}.") for e in excludes):
+                    continue
+                if includes is not None and not selected(path, includes):
+                    continue
+                if isinstance(value, dict) and not (
+                    includes is not None and path in includes
+                ):
+                    value = filter_dict(value, f"{path}.")
+                gefilterd[key] = value
+            return gefilterd
+
+        return filter_dict(source)
+
+    @staticmethod
+    def _total(total: int, track_total_hits) -> dict:
+        if track_total_hits is True:
+            return {"value": total, "relation": "eq"}
+        limiet = 0 if track_total_hits is False else int(track_total_hits)
+        if total > limiet:
+            return {"value": limiet, "relation": "gte"}
+        return {"value": total, "relation": "eq"}
+
+    # Aggregations -----------------------------------------------------------
+
+    def _aggregate(self, ids: list[str], agg: dict) -> dict:
+        sub_aggs = agg.get("aggs", agg.get("aggregations", {}))
+        soort = next(key for key in agg if key not in ("aggs", "aggregations"))
+        definitie = agg[soort]
+        if soort == "terms":
+            buckets = self._terms_buckets(ids, definitie)
+        elif soort == "date_histogram":
+            buckets = self._date_histogram_buckets(ids, definitie)
+        else:
+            raise UnsupportedSearch(f"{soort} aggregatie")
+        result_buckets = []
+        for key, bucket_ids, extra in buckets:
+            bucket = {"key": key, **extra, "doc_count": len(bucket_ids)}
+            for naam, sub_agg in sub_aggs.items():
+                bucket[naam] = self._aggregate(bucket_ids, sub_agg)
+            result_buckets.append(bucket)
+        result = {"buckets": result_buckets}
+        if soort == "terms":
+            result.update(doc_count_error_upper_bound=0, sum_other_doc_count=0)
+        return result
+
+    def _group(self, ids, naam, key=lambda value: value) -> dict[Any, list[str]]:
+        groepen: dict[Any, list[str]] = {}
+        for object_id in ids:
+            for value in {key(value) for value in self._values(object_id, naam)}:
+                groepen.setdefault(value, []).append(object_id)
+        return groepen
+
+    @staticmethod
+    def _order(items, order, count):
+        order = order or {"_count": "desc"}
+        ((op, richting),) = order.items()
+        if op == "_key":
+            return sorted(items, key=lambda item: item[0], reverse=richting == "desc")
+        return sorted(
+            sorted(items, key=lambda item: item[0]),
+            key=lambda item: count(item),
+            reverse=richting == "desc",
+        )
+
+    def _terms_buckets(self, ids, definitie):
+        groepen = self._group(ids, definitie["field"])
+        items = [
+            item
+            for item in groepen.items()
+            if len(item[1]) >= definitie.get("min_doc_count", 1)
+        ]
+        items = self._order(items, definitie.get("order"), lambda item: len(item[1]))
+        return [(key, bucket_ids, {}) for key, bucket_ids in items][
+            : definitie.get("size", 10)
+        ]
+
+    def _date_histogram_buckets(self, ids, definitie):
+        interval = definitie.get("calendar_interval", definitie.get("interval"))
+        if interval in ("year", "1y"):
+            def afronden(moment):
+                return datetime(moment.year, 1, 1)
+        elif interval in ("month", "1M"):
+            def afronden(moment):
+                return datetime(moment.year, moment.month, 1)
+        elif interval in ("day", "1d"):
+            def afronden(moment):
+                return datetime(moment.year, moment.month, moment.day)
+        else:
+            raise UnsupportedSearch(f"date_histogram interval {interval}")
+        groepen = self._group(ids, definitie["field"], afronden)
+        items = [
+            item
+            for item in groepen.items()
+            if len(item[1]) >= definitie.get("min_doc_count", 1)
+        ]
+        items = self._order(
+            items, definitie.get("order", {"_key": "asc"}), lambda item: len(item[1])
+        )
+        fmt = definitie.get("format")
+        return [
+            (
+                int(moment.replace(tzinfo=timezone.utc).timestamp() * 1000),
+                bucket_ids,
+                {
+                    "key_as_string": (
+                        _java_format(moment, fmt)
+                        if fmt
+                        else moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+                    )
+                },
+            )
+            for moment, bucket_ids in items
+        ]
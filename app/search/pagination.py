@@ -0,0 +1,102 @@
+import base64
+import binascii
+import hashlib
+from typing import Any
+
+import orjson
+from elasticsearch8 import BadRequestError
+from elasticsearch8 import Elasticsearch
+from elasticsearch8 import NotFoundError
+
+# Start value of the cursor parameter, as in Solr's cursorMark
+FIRST_CURSOR = "*"
+
+
+class InvalidCursor(ValueError):
+    """
+    The cursor token can't be decoded, belongs to another query or its point
+    in time has expired.
+    """
+
+
+def query_hash(query: dict, sort: list) -> str:
+    """Fingerprint of a query and its sort, independent of the key order."""
+    payload = orjson.dumps({"query": query, "sort": sort}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha1(payload).hexdigest()
+
+
+def encode_cursor(pit_id: str, search_after: list[Any], query_key: str) -> str:
+    payload = orjson.dumps(
+        {"pit": pit_id, "search_after": search_after, "query": query_key}
+    )
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(token: str) -> tuple[str, list[Any], str]:
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        return payload["pit"], payload["search_after"], payload["query"]
+    except (
+        binascii.Error,
+        UnicodeEncodeError,
+        orjson.JSONDecodeError,
+        KeyError,
+        TypeError,
+    ):
+        raise InvalidCursor(f"Ongeldige cursor: {token}")
+
+
+def search_page(
+    es: Elasticsearch,
+    index: str,
+    query: dict,
+    sort: list,
+    size: int,
+    cursor: str,
+    keep_alive: str = "1m",
+    source: list[str] | None = None,
+) -> tuple[dict, str | None]:
+    """
+    Fetch one page of hits with search_after on a point in time.
+
+    Every page is a range query on the sort values of the previous page, so
+    deep pages cost as much as the first one and the result window does not
+    apply. ES adds the _shard_doc tiebreaker to the sort of a PIT search.
+    The cursor carries a hash of the query and sort it was made for: the
+    search_after values of another query would silently skip or repeat hits.
+
+    :param cursor: FIRST_CURSOR or the token of the previous page
+    :param source: _source includes, everything when None
+    :return: the ES result and the token of the next page, None on the last page
+    """
+    query_key = query_hash(query, sort)
+    if cursor == FIRST_CURSOR:
+        pit_id = es.open_point_in_time(index=index, keep_alive=keep_alive)["id"]
+        search_after = None
+    else:
+        pit_id, search_after, cursor_key = decode_cursor(cursor)
+        if cursor_key != query_key:
+            raise InvalidCursor(
+                "De cursor hoort bij een andere zoekopdracht, "
+                "begin opnieuw met cursor=*"
+            )
+    try:
+        result = es.search(
+            query=query,
+            sort=sort,
+            size=size,
+            pit={"id": pit_id, "keep_alive": keep_alive},
+            search_after=search_after,
+            track_total_hits=False,
+            source=source,
+        )
+    except (BadRequestError, NotFoundError):
+        raise InvalidCursor(
+            "De cursor is ongeldig of verlopen, begin opnieuw met cursor=*"
+        )
+    pit_id = result.get("pit_id", pit_id)
+    hits = result["hits"]["hits"]
+    if len(hits) < size:
+        es.close_point_in_time(id=pit_id)
+        return result, None
+    return result, encode_cursor(pit_id, hits[-1]["sort"], query_key)
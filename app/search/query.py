@@ -5,6 +5,11 @@ from datetime import timedelta
 from oe_utils.search import parse_sort_string as oe_parse_sort_string
 from oe_utils.search.query_builder import QueryBuilder
 
+from app.search.geo import parse_afstand
+from app.search.geo import parse_bbox
+from app.search.geo import parse_geometrie
+from app.search.mapping.plannen import zoektekst_boosts
+
 
 def date_format_converter(date_text):
     return datetime.strptime(date_text, "%d-%m-%Y").strftime("%Y-%m-%d")
@@ -37,9 +42,12 @@ class PlannenQueryBuilder(QueryBuilder):
                 "datum_goedkeuring_van": (self._build_goedkeuring_van_filter,),
                 "datum_goedkeuring_tot": (self._build_goedkeuring_tot_filter,),
                 "beheersplan_verlopen": (self._build_beheersplan_verlopen_filter,),
+                "bbox": (self._build_bbox_filter,),
+                "intersecteert": (self._build_intersecteert_filter,),
+                "binnen_afstand": (self._build_binnen_afstand_filter,),
             }
         )
-        self.text_boosted_fields = [{"*": 1}]
+        self.text_boosted_fields = zoektekst_boosts
 
     # def add_user_filter(self, user_acls):
     #     self.filters.append({"terms": {"acls": user_acls}})
@@ -66,6 +74,32 @@ class PlannenQueryBuilder(QueryBuilder):
             }
         return {"range": {"einddatum": {"gte": (date.today()).strftime("%Y-%m-%d")}}}
 
+    def _build_bbox_filter(self, value):
+        return {
+            "geo_shape": {
+                "geometrie": {"shape": parse_bbox(value), "relation": "intersects"}
+            }
+        }
+
+    def _build_intersecteert_filter(self, value):
+        return {
+            "geo_shape": {
+                "geometrie": {
+                    "shape": parse_geometrie(value),
+                    "relation": "intersects",
+                }
+            }
+        }
+
+    def _build_binnen_afstand_filter(self, value):
+        afstand = parse_afstand(value)
+        return {
+            "geo_distance": {
+                "distance": afstand["afstand"],
+                "geometrie": afstand["punt"],
+            }
+        }
+
     def _build_onderwerp_filter(self, value):
         return {
             "simple_query_string": {
@@ -0,0 +1,115 @@
+import logging
+import time
+
+import orjson
+from redis import Redis
+
+from app.search.mapping.zoekopdrachten import zoekopdrachten_index
+from app.search.mapping.zoekopdrachten import zoekopdrachten_index_name
+from app.search.mapping.zoekopdrachten import zoekopdrachten_mapping
+
+log = logging.getLogger(__name__)
+
+# Maximum aantal zoekopdrachten dat per percolatie een treffer kan opleveren
+MAX_ZOEKOPDRACHTEN = 10000
+TREFFERS_KANAAL = "plannen:zoekopdrachten:treffers"
+
+
+def treffers_key(zoekopdracht_id: str) -> str:
+    return f"plannen:zoekopdrachten:{zoekopdracht_id}:treffers"
+
+
+def ensure_zoekopdrachten_index(es, index: str) -> None:
+    """
+    Create the percolator index of the saved searches next to index.
+
+    An existing index is kept, so the saved searches survive a reindex of
+    the plannen; only new fields of the plannen mapping are added to it.
+    """
+    name = zoekopdrachten_index_name(index)
+    if es.indices.exists(index=name):
+        es.indices.put_mapping(index=name, **zoekopdrachten_mapping)
+    else:
+        es.indices.create(
+            index=name,
+            settings=zoekopdrachten_index["settings"],
+            mappings=zoekopdrachten_mapping,
+        )
+
+
+def percoleer(es, index: str, plannen: list[dict]) -> dict[str, list[int]]:
+    """
+    Match plan documents against all saved searches in one percolate search.
+
+    :param plannen: plan documents as they were indexed
+    :return: the ids of the matching plannen per saved search id
+    """
+    if not plannen:
+        return {}
+    result = es.search(
+        index=zoekopdrachten_index_name(index),
+        query={"percolate": {"field": "query", "documents": plannen}},
+        source=False,
+        size=MAX_ZOEKOPDRACHTEN,
+    )
+    if result["hits"]["total"]["value"] > MAX_ZOEKOPDRACHTEN:
+        log.warning(
+            "Meer dan %d zoekopdrachten voldoen aan de plannen, enkel de eerste "
+            "krijgen een treffer.",
+            MAX_ZOEKOPDRACHTEN,
+        )
+    return {
+        hit["_id"]: [
+            plannen[slot]["id"]
+            for slot in hit.get("fields", {}).get("_percolator_document_slot", [0])
+        ]
+        for hit in result["hits"]["hits"]
+    }
+
+
+def bewaar_treffers(
+    redis: Redis,
+    treffers: dict[str, list[int]],
+    ttl: int,
+    max_treffers: int = 1000,
+) -> None:
+    """
+    Record the matching plannen per saved search and publish them.
+
+    Every saved search keeps its last max_treffers matches, scored by the time
+    they were recorded, in a sorted set. The matches are also published on
+    TREFFERS_KANAAL for whoever wants to notify the owners.
+    """
+    if not treffers:
+        return
+    nu = time.time()
+    with redis.pipeline(transaction=False) as pipe:
+        for zoekopdracht_id, plan_ids in treffers.items():
+            key = treffers_key(zoekopdracht_id)
+            pipe.zadd(key, {str(plan_id): nu for plan_id in plan_ids})
+            pipe.zremrangebyrank(key, 0, -max_treffers - 1)
+            pipe.expire(key, ttl)
+            pipe.publish(
+                TREFFERS_KANAAL,
+                orjson.dumps({"zoekopdracht": zoekopdracht_id, "plannen": plan_ids}),
+            )
+        pipe.execute()
+
+
+def get_treffers(
+    redis: Redis, zoekopdracht_id: str, sinds: float | None = None
+) -> list[tuple[int, float]]:
+    """The plannen matched by a saved search since a unix timestamp, oldest first."""
+    return [
+        (int(plan_id), tijdstip)
+        for plan_id, tijdstip in redis.zrangebyscore(
+            treffers_key(zoekopdracht_id),
+            "-inf" if sinds is None else sinds,
+            "+inf",
+            withscores=True,
+        )
+    ]
+
+
+def verwijder_treffers(redis: Redis, zoekopdracht_id: str) -> None:
+    redis.delete(treffers_key(zoekopdracht_id))
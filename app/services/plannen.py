@@ -1,20 +1,51 @@
+from datetime import datetime
+from typing import AsyncIterator
+from typing import Iterator
 from typing import Optional
 
 from fastapi import Request
+from sqlalchemy import String
+from sqlalchemy import cast
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
 
 from app.mappers.plannen import pydantic_bestand_to_db
 from app.mappers.plannen import pydantic_plan_to_db
 from app.mappers.plannen import pydantic_status_to_db
 from app.models import Plan
 from app.models import PlanBestand
+from app.models import PlanRelatie
 from app.models import PlanStatus
+from app.models.plan import PlanConcept
 from app.schemas import BestandCreate
 from app.schemas import BestandUpdate
 from app.schemas import StatusCreate
 from app.schemas.plannen import PlanCreate
 from app.schemas.plannen import PlanUpdate
 
+# Width of the web mercator world in meters, tile z is this / 2**z wide
+WEB_MERCATOR_WORLD = 40075016.68557849
+
+# Eager-loading profile for reads that render a full PlanResponse.
+# Every collection is fetched with one SELECT ... WHERE plan_id IN (...),
+# so the number of queries stays fixed no matter how many children a plan has.
+PLAN_DETAIL_OPTIONS = (
+    selectinload(Plan.locatie_elementen),
+    selectinload(Plan.bestanden),
+    selectinload(Plan.erfgoedobjecten),
+    selectinload(Plan.relaties).options(
+        joinedload(PlanRelatie.naar).load_only(Plan.id),
+        joinedload(PlanRelatie.relatietype),
+    ),
+    selectinload(Plan.statussen),
+    joinedload(Plan.status),
+    selectinload(Plan.concepten).joinedload(PlanConcept.plankenmerk),
+)
+
 
 class PlanService:
     """Service for Plan CRUD operations."""
@@ -25,29 +56,148 @@ class PlanService:
         db_plan = pydantic_plan_to_db(plan)
         db.add(db_plan)
         db.commit()
-        db.refresh(db_plan)
 
-        return db_plan
+        return PlanService.get_plan(db=db, plan_id=db_plan.id, populate_existing=True)
 
     @staticmethod
-    def get_plan(db: Session, plan_id: int) -> Optional[Plan]:
-        """Get plan by ID."""
-        return db.query(Plan).filter(Plan.id == plan_id).first()
+    def get_plan(
+        db: Session, plan_id: int, populate_existing: bool = False
+    ) -> Optional[Plan]:
+        """
+        Get plan by ID, with the whole aggregate eagerly loaded.
+        With populate_existing the objects already in the session are reloaded
+        too: collections that stayed loaded after a commit otherwise keep their
+        unloaded relationships, which can't be lazy loaded on an AsyncSession.
+        """
+        return (
+            db.query(Plan)
+            .options(*PLAN_DETAIL_OPTIONS)
+            .execution_options(populate_existing=populate_existing)
+            .filter(Plan.id == plan_id)
+            .first()
+        )
+
+    @staticmethod
+    def get_plannen_by_ids(db: Session, plan_ids: list[int]) -> list[Plan]:
+        """
+        Get the plans with the given ids, with the whole aggregate eagerly loaded.
+        Every relationship is fetched with one IN query for all plans together.
+        """
+        return list(
+            db.scalars(
+                select(Plan)
+                .options(*PLAN_DETAIL_OPTIONS)
+                .filter(Plan.id.in_(plan_ids))
+                .order_by(Plan.id)
+            )
+        )
 
     @staticmethod
     def get_plannen(db: Session, skip: int = 0, limit: int = 100) -> list[type[Plan]]:
         """Get list of plans with pagination."""
         return db.query(Plan).offset(skip).limit(limit).all()
 
+    @staticmethod
+    def _export_query(batch_size: int):
+        return (
+            select(Plan)
+            .options(*PLAN_DETAIL_OPTIONS)
+            .order_by(Plan.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+    @staticmethod
+    def iter_plannen(db: Session, batch_size: int = 500) -> Iterator[list[Plan]]:
+        """
+        Stream all plans in batches over a server-side cursor.
+        The relationships of every batch are loaded with one IN query each,
+        and a batch is expunged once it is consumed, so memory stays flat.
+        """
+        result = db.scalars(PlanService._export_query(batch_size))
+        for partition in result.partitions():
+            yield partition
+            db.expunge_all()
+
+    @staticmethod
+    async def aiter_plannen(
+        db: AsyncSession, batch_size: int = 500
+    ) -> AsyncIterator[list[Plan]]:
+        """Async counterpart of iter_plannen."""
+        result = await db.stream_scalars(PlanService._export_query(batch_size))
+        async for partition in result.partitions():
+            yield partition
+            db.expunge_all()
+
+    @staticmethod
+    def get_tile(db: Session, z: int, x: int, y: int) -> tuple[bytes, list[int]]:
+        """
+        Render the plans in web mercator tile z/x/y as a Mapbox vector tile,
+        with id, onderwerp and status as attributes.
+        Also returns the ids of the plans in the tile, to invalidate it later.
+        """
+        envelope = func.ST_TileEnvelope(z, x, y)
+        # Densify the envelope, so it keeps its shape in Lambert 72
+        zoekgebied = func.ST_Transform(
+            func.ST_Segmentize(envelope, WEB_MERCATOR_WORLD / 2**z / 64), 31370
+        )
+        features = (
+            select(
+                Plan.id,
+                Plan.onderwerp,
+                cast(PlanStatus.status, String).label("status"),
+                func.ST_AsMVTGeom(
+                    func.ST_Transform(Plan.geometrie, 3857), envelope
+                ).label("geom"),
+            )
+            .outerjoin(PlanStatus, Plan.status_id == PlanStatus.id)
+            .filter(func.ST_Intersects(Plan.geometrie, zoekgebied))
+            .subquery("features")
+        )
+        tile, plan_ids = db.execute(
+            select(
+                func.ST_AsMVT(features.table_valued(), "plannen", 4096, "geom"),
+                func.array_agg(features.c.id),
+            )
+        ).one()
+        return bytes(tile or b""), list(plan_ids or [])
+
+    @staticmethod
+    def get_plan_bounds(
+        db: Session, plan_ids: list[int]
+    ) -> list[tuple[float, float, float, float]]:
+        """Bounding boxes of the plans' geometries, in WGS 84."""
+        box = func.Box2D(func.ST_Transform(Plan.geometrie, 4326))
+        rows = db.execute(
+            select(
+                func.ST_XMin(box),
+                func.ST_YMin(box),
+                func.ST_XMax(box),
+                func.ST_YMax(box),
+            ).filter(Plan.id.in_(plan_ids), Plan.geometrie.isnot(None))
+        )
+        return [tuple(row) for row in rows]
+
+    @staticmethod
+    def get_plan_version(db: Session, plan_id: int) -> Optional[datetime]:
+        """Get the updated_at of a plan without loading the plan itself."""
+        return db.scalar(select(Plan.updated_at).filter(Plan.id == plan_id))
+
+    @staticmethod
+    def touch_plan(db: Session, plan_id: int) -> None:
+        """Mark a plan as changed after one of its children changed."""
+        plan = db.get(Plan, plan_id)
+        if plan is not None:
+            plan.updated_at = func.clock_timestamp()
+
     @staticmethod
     def update_plan(db: Session, existing: Plan, plan: PlanUpdate) -> Optional[Plan]:
         """Update an existing plan."""
         db_plan = pydantic_plan_to_db(plan, existing=existing)
+        db_plan.updated_at = func.clock_timestamp()
         db.add(db_plan)
         db.commit()
-        db.refresh(db_plan)
 
-        return db_plan
+        return PlanService.get_plan(db=db, plan_id=db_plan.id, populate_existing=True)
 
     @staticmethod
     def delete_plan(db: Session, plan_id: int) -> bool:
@@ -67,6 +217,7 @@ class PlanService:
         """Add a bestand to a plan."""
         bestand = pydantic_bestand_to_db(bestand, plan_id)
         db.add(bestand)
+        PlanService.touch_plan(db, plan_id)
         db.commit()
         db.refresh(bestand)
         return bestand
@@ -80,13 +231,25 @@ class PlanService:
             bestand_data, existing.plan_id, existing=existing
         )
         db.add(db_bestand)
+        PlanService.touch_plan(db, existing.plan_id)
         db.commit()
         db.refresh(db_bestand)
         return db_bestand
 
+    @staticmethod
+    def get_bestanden(db: Session, plan_id: int) -> list[PlanBestand]:
+        """Get all bestanden of a plan."""
+        return (
+            db.query(PlanBestand)
+            .filter(PlanBestand.plan_id == plan_id)
+            .order_by(PlanBestand.id)
+            .all()
+        )
+
     @staticmethod
     def delete_bestand(db: Session, db_bestand: PlanBestand) -> bool:
         """Delete a bestand from a plan."""
+        PlanService.touch_plan(db, db_bestand.plan_id)
         db.delete(db_bestand)
         db.commit()
         return True
@@ -98,17 +261,54 @@ class PlanService:
         """Add a status to a plan."""
         status = pydantic_status_to_db(status, plan_id)
         db.add(status)
+        db.flush()
+        PlanService.update_current_status(db, plan_id)
+        PlanService.touch_plan(db, plan_id)
         db.commit()
         db.refresh(status)
         return status
 
+    @staticmethod
     def get_statussen(db: Session, plan_id: int) -> list[type[PlanStatus]]:
         """Get all statuses for a plan."""
         return db.query(PlanStatus).filter(PlanStatus.plan_id == plan_id).all()
 
+    @staticmethod
+    def has_status(db: Session, plan_id: int, status_id: int) -> bool:
+        """Check that a status exists and belongs to the plan, without loading it."""
+        return (
+            db.scalar(
+                select(PlanStatus.id).filter(
+                    PlanStatus.id == status_id, PlanStatus.plan_id == plan_id
+                )
+            )
+            is not None
+        )
+
     @staticmethod
     def delete_status(db: Session, db_status: PlanStatus) -> bool:
         """Delete a status from a plan."""
+        PlanService.update_current_status(
+            db, db_status.plan_id, exclude_status_id=db_status.id
+        )
+        PlanService.touch_plan(db, db_status.plan_id)
+        db.flush()
         db.delete(db_status)
         db.commit()
         return True
+
+    @staticmethod
+    def update_current_status(
+        db: Session, plan_id: int, exclude_status_id: int | None = None
+    ) -> PlanStatus | None:
+        """Point Plan.status at the most recent status of the plan."""
+        stmt = select(PlanStatus).filter(PlanStatus.plan_id == plan_id)
+        if exclude_status_id is not None:
+            stmt = stmt.filter(PlanStatus.id != exclude_status_id)
+        current = db.scalars(
+            stmt.order_by(PlanStatus.datum.desc(), PlanStatus.id.desc()).limit(1)
+        ).first()
+        plan = db.get(Plan, plan_id)
+        if plan is not None:
+            plan.status = current
+        return current
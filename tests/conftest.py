@@ -4,12 +4,16 @@ from unittest.mock import MagicMock
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool
 from dotenv import load_dotenv
 from redis import Redis
 
 from app.main import app
+from app.constants import settings
+from app.core.db import async_database_url
 from app.core.dependencies import (
     get_db,
     get_redis,
@@ -18,12 +22,23 @@ from app.core.dependencies import (
     get_token_provider,
     get_indexer,
     get_searchengine,
+    get_plan_cache,
+    get_es_client,
+    get_facetten_cache,
+    get_tile_cache,
+    get_zoek_cache,
+    get_single_flight,
 )
 from app.models import Base  # assuming you have Base in models
+from app.cache.plannen import PlanCache
+from app.cache.search import SearchCache
+from app.cache.singleflight import SingleFlight
+from app.cache.tiles import TileCache
 from storageprovider.client import StorageProviderClient
 from app.storage.conent_manager import ContentManager
 from oeauth.openid import OpenIDHelper
 from app.search.indexer import Indexer
+from app.search.memory import InMemorySearchEngine
 from oe_utils.search.searchengine import SearchEngine
 
 # -------------------------------------------------------------------------
@@ -36,6 +51,16 @@ TEST_DB_URL = os.environ["DATABASE_URL"]
 engine = create_engine(TEST_DB_URL, future=True)
 TestingSessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+# DATABASE_ASYNC=true runs the same tests against AsyncSessions on asyncpg.
+# Every TestClient runs its own event loop, so connections are never pooled.
+if settings.DATABASE_ASYNC:
+    async_engine = create_async_engine(
+        async_database_url(TEST_DB_URL), poolclass=NullPool
+    )
+    TestingAsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
 
 # -------------------------------------------------------------------------
 # Run migrations once per session (or create tables if no Alembic)
@@ -51,8 +76,25 @@ def setup_database():
 # -------------------------------------------------------------------------
 # DB transaction fixture (rollback per test)
 # -------------------------------------------------------------------------
+def truncate_tables():
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    with engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+
 @pytest.fixture
 def db_session():
+    if settings.DATABASE_ASYNC:
+        # Requests use their own asyncpg connections and really commit,
+        # so the tables are emptied after every test instead.
+        session = TestingSessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+            truncate_tables()
+        return
+
     connection = engine.connect()
     trans = connection.begin()
 
@@ -73,6 +115,14 @@ def db_session():
         connection.close()
 
 
+@pytest.fixture
+def db_bind(db_session):
+    """The engine or connection the requests of a test run their queries on."""
+    if settings.DATABASE_ASYNC:
+        return async_engine.sync_engine
+    return db_session.get_bind()
+
+
 # -------------------------------------------------------------------------
 # Mock external dependencies
 # -------------------------------------------------------------------------
@@ -110,6 +160,44 @@ def fake_search_engine():
     return MagicMock()
 
 
+@pytest.fixture
+def fake_es_client():
+    return MagicMock()
+
+
+@pytest.fixture
+def fake_plan_cache():
+    """Plan cache that never stores anything; the fake indexer can't evict it."""
+    return PlanCache(redis=None, max_size=0)
+
+
+@pytest.fixture
+def fake_facetten_cache(fake_redis):
+    return SearchCache(fake_redis, "facetten")
+
+
+@pytest.fixture
+def fake_zoek_cache(fake_redis):
+    return SearchCache(fake_redis, "zoekresultaten")
+
+
+@pytest.fixture
+def fake_single_flight():
+    return SingleFlight()
+
+
+@pytest.fixture
+def memory_search_engine():
+    """In-process plannen index; add documents with bulk_add_to_index."""
+    return InMemorySearchEngine()
+
+
+@pytest.fixture
+def fake_tile_cache():
+    """Tile cache that never stores anything; the fake indexer can't evict it."""
+    return TileCache(redis=None)
+
+
 # -------------------------------------------------------------------------
 # Override FastAPI dependencies with test doubles
 # -------------------------------------------------------------------------
@@ -122,21 +210,47 @@ def test_app(
     fake_token_provider,
     fake_indexer,
     fake_search_engine,
+    fake_plan_cache,
+    fake_es_client,
+    fake_facetten_cache,
+    fake_tile_cache,
+    fake_zoek_cache,
+    fake_single_flight,
 ):
     """FastAPI app with dependencies overridden for testing."""
 
     def _get_test_db():
         yield db_session
 
-    app.dependency_overrides[get_db] = _get_test_db
+    async def _get_test_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = (
+        _get_test_async_db if settings.DATABASE_ASYNC else _get_test_db
+    )
     app.dependency_overrides[get_redis] = lambda: fake_redis
     app.dependency_overrides[get_storage_provider] = lambda: fake_storage_provider
     app.dependency_overrides[get_content_manager] = lambda: fake_content_manager
     app.dependency_overrides[get_token_provider] = lambda: fake_token_provider
     app.dependency_overrides[get_indexer] = lambda: fake_indexer
     app.dependency_overrides[get_searchengine] = lambda: fake_search_engine
+    app.dependency_overrides[get_plan_cache] = lambda: fake_plan_cache
+    app.dependency_overrides[get_es_client] = lambda: fake_es_client
+    app.dependency_overrides[get_facetten_cache] = lambda: fake_facetten_cache
+    app.dependency_overrides[get_tile_cache] = lambda: fake_tile_cache
+    app.dependency_overrides[get_zoek_cache] = lambda: fake_zoek_cache
+    app.dependency_overrides[get_single_flight] = lambda: fake_single_flight
 
     with TestClient(app) as client:
         yield client
 
     app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def search_app(test_app, memory_search_engine):
+    """test_app searching the in-memory index instead of ES mocks."""
+    app.dependency_overrides[get_searchengine] = lambda: memory_search_engine
+    app.dependency_overrides[get_es_client] = lambda: memory_search_engine
+    return test_app
@@ -0,0 +1,89 @@
+from datetime import datetime
+from datetime import timezone
+
+from app.cache.plannen import PlanCache
+from app.core.responses import ORJSONUTCResponse
+
+
+def test_plan_cache_evicts_least_recently_used():
+    cache = PlanCache(redis=None, max_size=2)
+    cache.set(1, {"versie": "a"})
+    cache.set(2, {"versie": "b"})
+    cache.get(1)
+    cache.set(3, {"versie": "c"})
+
+    assert cache.get(1) == {"versie": "a"}
+    assert cache.get(2) is None
+    assert cache.get(3) == {"versie": "c"}
+
+
+def test_plan_cache_invalidate_removes_local_entries():
+    cache = PlanCache(redis=None, max_size=10)
+    cache.set(1, {"versie": "a"})
+    cache.set(2, {"versie": "b"})
+
+    cache.invalidate({1})
+
+    assert cache.get(1) is None
+    assert cache.get(2) == {"versie": "b"}
+
+
+def test_plan_cache_handles_published_invalidations():
+    cache = PlanCache(redis=None, max_size=10)
+    cache.set(7, {"versie": "a"})
+
+    cache._handle_message({"type": "message", "data": "[7]"})
+
+    assert cache.get(7) is None
+
+
+def test_plan_cache_with_zero_size_stores_nothing():
+    cache = PlanCache(redis=None, max_size=0)
+    cache.set(1, {"versie": "a"})
+
+    assert cache.get(1) is None
+
+
+def test_plan_cache_drops_entries_rendered_before_an_invalidation():
+    cache = PlanCache(redis=None, max_size=10)
+    generation = cache.generation(1)
+
+    cache.invalidate({1})
+    cache.set(1, {"versie": "oud"}, generation)
+
+    assert cache.get(1) is None
+
+
+def test_plan_cache_stores_entries_of_the_current_generation():
+    cache = PlanCache(redis=None, max_size=10)
+    cache.invalidate({1})
+    generation = cache.generation(1)
+
+    cache.set(1, {"versie": "nieuw"}, generation)
+
+    assert cache.get(1) == {"versie": "nieuw"}
+
+
+def test_plan_cache_redis_write_is_guarded_by_the_generation(fake_redis):
+    writer = PlanCache(redis=fake_redis, max_size=0)
+    other_worker = PlanCache(redis=fake_redis, max_size=0)
+    generation = writer.generation(1)
+
+    other_worker.invalidate({1})
+    writer.set(1, {"versie": "oud"}, generation)
+
+    assert writer.get(1) is None
+    writer.set(1, {"versie": "nieuw"}, writer.generation(1))
+    assert writer.get(1) == {"versie": "nieuw"}
+
+
+def test_plan_cache_redis_round_trip_serializes_like_a_fresh_response(fake_redis):
+    plan = {"id": 1, "datum": datetime(2023, 1, 1, 12, tzinfo=timezone.utc)}
+    writer = PlanCache(redis=fake_redis, max_size=0)
+    other_worker = PlanCache(redis=fake_redis, max_size=0)
+
+    writer.set(1, {"versie": "a", "plan": plan}, writer.generation(1))
+    cached = other_worker.get(1)
+
+    fresh = ORJSONUTCResponse(content=plan)
+    assert ORJSONUTCResponse(content=cached["plan"]).body == fresh.body
@@ -1,11 +1,15 @@
+import json
 from datetime import date
 
 import pytest
 from httpx import Client
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from starlette.testclient import TestClient
 
 from app.models.plan import Plan
+from app.models.plan import Relatietype
+from app.search.zoekopdrachten import bewaar_treffers
 
 def plan_payload(**overrides) -> dict:
     payload = {
@@ -273,3 +277,453 @@ def test_delete_plan_not_found_returns_404(
 
     assert response.status_code == 404
     assert response.json()["detail"] == "Plan not found"
+
+
+def count_queries(db_bind, action) -> int:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        action()
+    finally:
+        event.remove(db_bind, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+
+def test_get_plan_query_count_does_not_grow_with_relaties(
+    test_app: TestClient,
+    db_session: Session,
+    db_bind,
+) -> None:
+    db_session.add(
+        Relatietype(id="gerelateerd", type="is gerelateerd aan", inverse="gerelateerd")
+    )
+    db_session.commit()
+    doelen = [
+        test_app.post("/api/v1/plannen/", json=plan_payload()).json()["id"]
+        for _ in range(3)
+    ]
+    relatietype = {
+        "id": "gerelateerd",
+        "type": "is gerelateerd aan",
+        "inverse": "gerelateerd",
+    }
+    klein = test_app.post(
+        "/api/v1/plannen/",
+        json=plan_payload(relaties=[{"type": relatietype, "id": doelen[0]}]),
+    ).json()
+    groot = test_app.post(
+        "/api/v1/plannen/",
+        json=plan_payload(
+            relaties=[{"type": relatietype, "id": doel} for doel in doelen],
+            erfgoedobjecten=[
+                f"https://dev-id.erfgoed.net/aanduidingsobjecten/{i}"
+                for i in range(50)
+            ],
+        ),
+    ).json()
+
+    queries_klein = count_queries(
+        db_bind, lambda: test_app.get(f"/api/v1/plannen/{klein['id']}")
+    )
+    queries_groot = count_queries(
+        db_bind, lambda: test_app.get(f"/api/v1/plannen/{groot['id']}")
+    )
+
+    assert len(groot["relaties"]) == 3
+    assert queries_klein == queries_groot
+
+
+def status_payload(**overrides) -> dict:
+    payload = {
+        "status_id": 10,
+        "naam": "Klad",
+        "datum": "2025-10-16T16:11:32.598222+02:00",
+        "aanpasser_uri": "https://dev-id.erfgoed.net/actoren/12761",
+        "aanpasser_omschrijving": "Van Campenhout, Tim",
+        "opmerkingen": None,
+        "actief": False,
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_add_status_updates_current_status(
+    test_app: TestClient,
+    db_session: Session,
+) -> None:
+    created = test_app.post("/api/v1/plannen/", json=plan_payload()).json()
+    test_app.post(
+        f"/api/v1/plannen/{created['id']}/statussen",
+        json=status_payload(datum="2025-10-20T10:00:00+02:00"),
+    )
+    recent = test_app.post(
+        f"/api/v1/plannen/{created['id']}/statussen",
+        json=status_payload(
+            status_id=25,
+            naam="Klaar voor activatie",
+            datum="2025-10-21T10:00:00+02:00",
+        ),
+    ).json()
+
+    response = test_app.get(f"/api/v1/plannen/{created['id']}")
+
+    assert response.json()["status"]["status_id"] == 25
+    assert db_session.get(Plan, created["id"]).status_id == recent["id"]
+
+
+def test_get_plan_returns_304_for_matching_etag(test_app: TestClient) -> None:
+    created = test_app.post("/api/v1/plannen/", json=plan_payload()).json()
+    first = test_app.get(f"/api/v1/plannen/{created['id']}")
+    etag = first.headers["etag"]
+
+    response = test_app.get(
+        f"/api/v1/plannen/{created['id']}", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+
+def test_plan_etag_changes_when_status_is_added(test_app: TestClient) -> None:
+    created = test_app.post("/api/v1/plannen/", json=plan_payload()).json()
+    etag = test_app.get(f"/api/v1/plannen/{created['id']}").headers["etag"]
+    statussen_etag = test_app.get(
+        f"/api/v1/plannen/{created['id']}/statussen"
+    ).headers["etag"]
+
+    test_app.post(f"/api/v1/plannen/{created['id']}/statussen", json=status_payload())
+
+    response = test_app.get(
+        f"/api/v1/plannen/{created['id']}", headers={"If-None-Match": etag}
+    )
+    statussen = test_app.get(
+        f"/api/v1/plannen/{created['id']}/statussen",
+        headers={"If-None-Match": statussen_etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert statussen.status_code == 200
+    assert len(statussen.json()) == 1
+
+
+def test_get_status_of_another_plan_returns_404_before_the_etag(
+    test_app: TestClient,
+) -> None:
+    plan = test_app.post("/api/v1/plannen/", json=plan_payload()).json()
+    other = test_app.post("/api/v1/plannen/", json=plan_payload()).json()
+    created = test_app.post(
+        f"/api/v1/plannen/{plan['id']}/statussen", json=status_payload()
+    ).json()
+
+    response = test_app.get(
+        f"/api/v1/plannen/{other['id']}/statussen/{created['id']}",
+        headers={"If-None-Match": "*"},
+    )
+
+    assert response.status_code == 404
+
+
+def test_export_plannen_streams_one_plan_per_line(test_app: TestClient) -> None:
+    ids = [
+        test_app.post("/api/v1/plannen/", json=plan_payload()).json()["id"]
+        for _ in range(3)
+    ]
+
+    response = test_app.get("/api/v1/plannen/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    plannen = [json.loads(line) for line in response.text.splitlines()]
+    assert [plan["id"] for plan in plannen] == ids
+    assert plannen[0]["locatie_elementen"][0]["gemeente"]["naam"] == "Leuven"
+
+
+def test_get_plannen_batch_returns_plans_and_missing_ids(
+    test_app: TestClient,
+) -> None:
+    ids = [
+        test_app.post("/api/v1/plannen/", json=plan_payload()).json()["id"]
+        for _ in range(2)
+    ]
+
+    response = test_app.get(f"/api/v1/plannen/batch?ids={ids[1]},999,{ids[0]}")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [plan["id"] for plan in data["plannen"]] == [ids[1], ids[0]]
+    assert data["niet_gevonden"] == [999]
+
+
+def test_get_plannen_does_not_compute_aggregations(
+    test_app: TestClient, fake_search_engine
+) -> None:
+    fake_search_engine.query.return_value.data = []
+
+    response = test_app.get("/api/v1/plannen/?sort=-datum_goedkeuring")
+
+    assert response.status_code == 200
+    assert "aggregations" not in fake_search_engine.query.call_args.kwargs
+
+
+def test_get_facetten_computes_requested_facetten_once(
+    test_app: TestClient, fake_es_client, fake_redis
+) -> None:
+    fake_es_client.search.return_value = {
+        "aggregations": {
+            "gemeente": {"buckets": [{"key": "Leuven", "doc_count": 3}]},
+            "jaar_goedkeuring": {
+                "buckets": [
+                    {"key": 1735689600000, "key_as_string": "2025", "doc_count": 2}
+                ]
+            },
+        }
+    }
+
+    url = "/api/v1/plannen/facetten?facetten=jaar_goedkeuring,gemeente"
+    first = test_app.get(url + "&provincie=Vlaams-Brabant")
+    second = test_app.get(url + "&provincie=Vlaams-Brabant")
+
+    assert first.status_code == 200
+    assert second.json() == first.json()
+    assert fake_es_client.search.call_count == 1
+    assert fake_es_client.search.call_args.kwargs["size"] == 0
+    assert set(fake_es_client.search.call_args.kwargs["aggregations"]) == {
+        "gemeente",
+        "jaar_goedkeuring",
+    }
+    assert [facet["naam"] for facet in first.json()] == [
+        "gemeente",
+        "jaar_goedkeuring",
+    ]
+    assert first.json()[1]["buckets"] == [{"key": "2025", "doc_count": 2}]
+
+    fake_redis.incr("plannen:index:generatie")
+    test_app.get(url + "&provincie=Vlaams-Brabant")
+
+    assert fake_es_client.search.call_count == 2
+
+
+def test_get_facetten_rejects_unknown_facet(test_app: TestClient) -> None:
+    response = test_app.get("/api/v1/plannen/facetten?facetten=onbekend")
+
+    assert response.status_code == 400
+
+
+def test_head_plannen_returns_count_headers(
+    test_app: TestClient, fake_es_client, fake_search_engine
+) -> None:
+    fake_es_client.search.return_value = {
+        "hits": {"total": {"value": 10000, "relation": "gte"}, "hits": []}
+    }
+
+    response = test_app.head("/api/v1/plannen/?gemeente=Leuven")
+
+    assert response.status_code == 200
+    assert response.headers["x-total-count"] == "10000"
+    assert response.headers["x-total-count-relation"] == "gte"
+    assert fake_es_client.search.call_args.kwargs["size"] == 0
+    fake_search_engine.query.assert_not_called()
+
+
+def test_get_plannen_alleen_aantal_returns_count(
+    test_app: TestClient, fake_es_client, fake_search_engine
+) -> None:
+    fake_es_client.search.return_value = {
+        "hits": {"total": {"value": 3, "relation": "eq"}, "hits": []}
+    }
+
+    response = test_app.get("/api/v1/plannen/?alleen_aantal=true")
+
+    assert response.status_code == 200
+    assert response.json() == {"aantal": 3, "relatie": "eq"}
+    assert response.headers["x-total-count"] == "3"
+    fake_search_engine.query.assert_not_called()
+
+
+def test_get_tile_renders_plan_geometries(test_app: TestClient) -> None:
+    test_app.post("/api/v1/plannen/", json=plan_payload())
+
+    response = test_app.get("/api/v1/plannen/tiles/0/0/0.mvt")
+    empty = test_app.get("/api/v1/plannen/tiles/1/0/1.mvt")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.mapbox-vector-tile"
+    assert len(response.content) > 0
+    assert empty.status_code == 200
+    assert empty.content == b""
+
+
+def test_get_tile_outside_zoom_level_returns_400(test_app: TestClient) -> None:
+    response = test_app.get("/api/v1/plannen/tiles/1/2/0.mvt")
+
+    assert response.status_code == 400
+
+
+def test_get_plannen_caches_results_until_the_index_changes(
+    test_app: TestClient, fake_search_engine, fake_redis
+) -> None:
+    fake_search_engine.query.return_value.data = [{"id": 1, "onderwerp": "Plan"}]
+
+    url = "/api/v1/plannen/?sort=-datum_goedkeuring&velden=onderwerp&"
+    first = test_app.get(url + "gemeente=Leuven&pagina=2")
+    second = test_app.get(url + "pagina=2&gemeente=Leuven")
+    other_page = test_app.get(url + "gemeente=Leuven&pagina=3")
+
+    assert first.json() == second.json() == [{"id": 1, "onderwerp": "Plan"}]
+    assert fake_search_engine.query.call_count == 2
+    assert other_page.status_code == 200
+
+    fake_redis.incr("plannen:index:generatie")
+    test_app.get(url + "gemeente=Leuven&pagina=2")
+
+    assert fake_search_engine.query.call_count == 3
+
+
+def test_get_suggesties_returns_ids_and_onderwerpen(
+    test_app: TestClient, fake_es_client
+) -> None:
+    search = fake_es_client.options.return_value.search
+    search.return_value = {
+        "hits": {"hits": [{"_source": {"id": 3, "onderwerp": "Abdij Park"}}]}
+    }
+
+    response = test_app.get("/api/v1/plannen/suggesties?q=abdij&aantal=5")
+
+    assert response.status_code == 200
+    assert [(s["id"], s["onderwerp"]) for s in response.json()] == [(3, "Abdij Park")]
+    assert search.call_args.kwargs["size"] == 5
+    assert search.call_args.kwargs["source"] == ["id", "onderwerp"]
+
+
+def test_get_plannen_default_sort_uses_index_sort_without_total(
+    test_app: TestClient, fake_es_client, fake_search_engine
+) -> None:
+    fake_es_client.search.return_value = {
+        "hits": {"hits": [{"_source": {"id": 1, "onderwerp": "Abdij"}}]}
+    }
+
+    response = test_app.get("/api/v1/plannen/?velden=onderwerp&pagina=3&per_pagina=5")
+
+    assert response.status_code == 200
+    assert response.json() == [{"id": 1, "onderwerp": "Abdij"}]
+    kwargs = fake_es_client.search.call_args.kwargs
+    assert kwargs["sort"] == [{"onderwerp.raw": {"order": "asc"}}]
+    assert kwargs["track_total_hits"] is False
+    assert (kwargs["from_"], kwargs["size"]) == (10, 5)
+    fake_search_engine.query.assert_not_called()
+
+
+def test_get_clusters_aggregates_the_filtered_plannen(
+    test_app: TestClient, fake_es_client
+) -> None:
+    fake_es_client.search.return_value = {
+        "aggregations": {
+            "clusters": {
+                "buckets": [
+                    {
+                        "key": "8/131/85",
+                        "doc_count": 4,
+                        "centroid": {"location": {"lat": 50.9, "lon": 4.7}},
+                    }
+                ]
+            }
+        }
+    }
+
+    response = test_app.get("/api/v1/plannen/clusters?precisie=8&gemeente=Leuven")
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"cel": "8/131/85", "aantal": 4, "centroid": {"lat": 50.9, "lon": 4.7}}
+    ]
+    kwargs = fake_es_client.search.call_args.kwargs
+    assert kwargs["size"] == 0
+    assert kwargs["aggregations"]["clusters"]["geotile_grid"]["precision"] == 8
+
+
+def test_create_zoekopdracht_stores_a_percolator_query(
+    test_app: TestClient, fake_es_client
+) -> None:
+    response = test_app.post(
+        "/api/v1/plannen/zoekopdrachten",
+        json={"naam": "Nieuw in Leuven", "filters": {"gemeente": "Leuven"}},
+    )
+
+    assert response.status_code == 201
+    zoekopdracht = response.json()
+    assert zoekopdracht["naam"] == "Nieuw in Leuven"
+    assert zoekopdracht["treffers"].endswith(
+        f"/zoekopdrachten/{zoekopdracht['id']}/treffers"
+    )
+    kwargs = fake_es_client.index.call_args.kwargs
+    assert kwargs["index"].endswith("_zoekopdrachten")
+    assert kwargs["id"] == zoekopdracht["id"]
+    assert "Leuven" in json.dumps(kwargs["document"]["query"])
+
+
+def test_get_zoekopdracht_treffers(
+    test_app: TestClient, fake_es_client, fake_redis
+) -> None:
+    fake_es_client.get.return_value = {
+        "_source": {
+            "naam": "Nieuw in Leuven",
+            "filters": {"gemeente": "Leuven"},
+            "aangemaakt": "2024-01-01T00:00:00+00:00",
+        }
+    }
+    bewaar_treffers(fake_redis, {"leuven": [7, 9]}, ttl=60)
+
+    response = test_app.get("/api/v1/plannen/zoekopdrachten/leuven/treffers")
+
+    assert response.status_code == 200
+    assert [treffer["id"] for treffer in response.json()] == [7, 9]
+    assert response.json()[0]["self"].endswith("/plannen/7")
+
+
+def test_get_plannen_searches_the_in_memory_index(
+    search_app: TestClient, memory_search_engine
+) -> None:
+    memory_search_engine.bulk_add_to_index(
+        [
+            {"id": 1, "onderwerp": "Abdij van Park", "gemeenten": [{"naam": "Leuven"}]},
+            {"id": 2, "onderwerp": "Begijnhof", "gemeenten": [{"naam": "Gent"}]},
+            {"id": 3, "onderwerp": "Arenberg", "gemeenten": [{"naam": "Leuven"}]},
+        ]
+    )
+
+    response = search_app.get("/api/v1/plannen/?gemeente=leuven&velden=onderwerp")
+    head = search_app.head("/api/v1/plannen/?gemeente=leuven")
+
+    assert response.status_code == 200
+    assert [plan["id"] for plan in response.json()] == [1, 3]
+    assert head.headers["X-Total-Count"] == "2"
+
+
+def test_get_plannen_passes_trusted_hits_through(
+    search_app: TestClient, memory_search_engine
+) -> None:
+    memory_search_engine.bulk_add_to_index([{"id": 1, "onderwerp": "Park"}])
+
+    response = search_app.get("/api/v1/plannen/")
+
+    assert response.status_code == 200
+    (plan,) = response.json()
+    assert plan["onderwerp"] == "Park"
+    assert plan["self"].endswith("/api/v1/plannen/1")
+    assert "geometrie_centroid" not in plan
+
+
+def test_unsupported_searches_return_501_on_the_in_memory_index(
+    search_app: TestClient,
+) -> None:
+    cursor = search_app.get("/api/v1/plannen/?cursor=*")
+    clusters = search_app.get("/api/v1/plannen/clusters?precisie=8")
+
+    assert cursor.status_code == 501
+    assert clusters.status_code == 501
+    assert "SEARCH_BACKEND=memory" in cursor.json()["detail"]
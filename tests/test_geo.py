@@ -0,0 +1,50 @@
+import pytest
+
+from app.search.geo import parse_afstand
+from app.search.geo import parse_bbox
+from app.search.geo import parse_geometrie
+
+
+def test_parse_bbox_returns_envelope():
+    assert parse_bbox("4.6,50.8,4.8,50.9") == {
+        "type": "envelope",
+        "coordinates": [[4.6, 50.9], [4.8, 50.8]],
+    }
+
+
+@pytest.mark.parametrize("bbox", ["4.6,50.8,4.8", "4.8,50.8,4.6,50.9", "a,b,c,d"])
+def test_parse_bbox_rejects_invalid_bbox(bbox):
+    with pytest.raises(ValueError):
+        parse_bbox(bbox)
+
+
+def test_parse_geometrie_accepts_wkt_and_geojson():
+    wkt = parse_geometrie("POINT (4.7 50.88)")
+    geojson = parse_geometrie(
+        '{"type": "Feature", '
+        '"geometry": {"type": "Point", "coordinates": [4.7, 50.88]}}'
+    )
+
+    assert wkt["type"] == geojson["type"] == "Point"
+    assert tuple(wkt["coordinates"]) == tuple(geojson["coordinates"]) == (4.7, 50.88)
+
+
+@pytest.mark.parametrize(
+    "geometrie", ["POINT (4.7", '{"type": "Punt"}', "POINT (200 0)"]
+)
+def test_parse_geometrie_rejects_invalid_geometrie(geometrie):
+    with pytest.raises(ValueError):
+        parse_geometrie(geometrie)
+
+
+def test_parse_afstand_defaults_to_meter():
+    assert parse_afstand("4.7,50.88,500") == {
+        "punt": {"lon": 4.7, "lat": 50.88},
+        "afstand": "500m",
+    }
+    assert parse_afstand("4.7,50.88,2km")["afstand"] == "2km"
+
+
+def test_parse_afstand_rejects_invalid_unit():
+    with pytest.raises(ValueError):
+        parse_afstand("4.7,50.88,2mi")
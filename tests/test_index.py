@@ -0,0 +1,76 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from app.search import index
+from app.search.indexer import DEFERRED_INVALIDATIONS
+from app.search.indexer import Indexer
+
+
+def test_index_operation_refreshes_before_expiring_the_search_caches(monkeypatch):
+    calls = MagicMock()
+
+    @contextmanager
+    def db_session(settings):
+        yield MagicMock()
+
+    monkeypatch.setattr(index, "fill_registry", MagicMock())
+    monkeypatch.setattr(index, "db_session", db_session)
+    monkeypatch.setattr(index, "SearchEngine", MagicMock())
+    monkeypatch.setattr(index, "_create_openid_helper", MagicMock())
+    monkeypatch.setattr(index, "index_beheersplan", calls.index_beheersplan)
+    monkeypatch.setattr(index, "refresh_index", calls.refresh_index)
+    monkeypatch.setattr(index, "expire_search_caches", calls.expire_search_caches)
+    monkeypatch.setattr(
+        index, "percoleer_zoekopdrachten", calls.percoleer_zoekopdrachten
+    )
+    settings = {"ELASTICSEARCH_URL": "http://es", "SEARCHENGINE.INDEX": "plannen"}
+
+    index.index_operation([1], [], [], settings)
+
+    assert [call[0] for call in calls.mock_calls] == [
+        "index_beheersplan",
+        "refresh_index",
+        "expire_search_caches",
+        "percoleer_zoekopdrachten",
+    ]
+
+
+def _indexer_with_listener(listener):
+    indexer = Indexer.__new__(Indexer)
+    indexer.cls_name = "Plan"
+    indexer.invalidation_listeners = [listener]
+    return indexer
+
+
+def _committed_session(info):
+    return SimpleNamespace(
+        index_new={"Plan": {1}},
+        index_dirty={"Plan": set()},
+        index_deleted={"Plan": {2}},
+        info=info,
+    )
+
+
+def test_invalidation_listeners_run_on_commit():
+    listener = MagicMock()
+    indexer = _indexer_with_listener(listener)
+
+    indexer.notify_invalidation_listeners(_committed_session({}))
+
+    listener.assert_called_once_with({1, 2})
+
+
+def test_invalidation_listeners_are_deferred_for_async_sessions():
+    listener = MagicMock()
+    indexer = _indexer_with_listener(listener)
+    deferred = []
+
+    indexer.notify_invalidation_listeners(
+        _committed_session({DEFERRED_INVALIDATIONS: deferred})
+    )
+
+    listener.assert_not_called()
+    (invalidate,) = deferred
+    invalidate()
+    listener.assert_called_once_with({1, 2})
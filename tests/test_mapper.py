@@ -1,11 +1,13 @@
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from types import SimpleNamespace
 from unittest.mock import MagicMock
 
+import orjson
 import pytest
 from pydantic_core import Url
 
 from app import models, schemas
+from app.core.responses import orjson_dumps
 from app.mappers import plannen as mapper
 from app.models import enums
 
@@ -76,7 +78,8 @@ def test_pydantic_plan_to_db_maps_basic_fields(monkeypatch, geometrie_payload):
     assert db_plan.erfgoedobjecten[0].erfgoedobject_id == "https://example.com/erfgoed/1"
 
 
-def test_plan_db_to_pydantic_builds_response(monkeypatch):
+@pytest.fixture
+def db_plan(monkeypatch):
     fake_geojson = {
         "type": "MultiPolygon",
         "crs": {"type": "name", "properties": {"name": "EPSG:31370"}},
@@ -157,10 +160,14 @@ def test_plan_db_to_pydantic_builds_response(monkeypatch):
         ],
         statussen=[plan_status],
     )
+    return plan
+
+
+def test_plan_db_to_pydantic_builds_response(db_plan):
     request = MagicMock()
     request.url_for.return_value = "https://api.test/plannen/1"
 
-    response = mapper.plan_db_to_pydantic(plan, request)
+    response = mapper.plan_db_to_pydantic(db_plan, request)
 
     assert response.id == 1
     assert response.uri == "https://plannen.test/1"
@@ -177,6 +184,28 @@ def test_plan_db_to_pydantic_builds_response(monkeypatch):
     assert response.actief is True
 
 
+def test_plan_db_to_dict_serializes_like_pydantic_response(db_plan):
+    request = MagicMock()
+    request.url_for.return_value = "https://api.test/plannen/1"
+
+    trusted = orjson.loads(orjson_dumps(mapper.plan_db_to_dict(db_plan, request)))
+    validated = mapper.plan_db_to_pydantic(db_plan, request).model_dump(mode="json")
+
+    assert trusted == validated
+
+
+def test_plan_db_to_dict_serializes_utc_datetimes_like_pydantic_response(db_plan):
+    request = MagicMock()
+    request.url_for.return_value = "https://api.test/plannen/1"
+    db_plan.status.datum = datetime(2023, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+    trusted = orjson.loads(orjson_dumps(mapper.plan_db_to_dict(db_plan, request)))
+    validated = mapper.plan_db_to_pydantic(db_plan, request).model_dump(mode="json")
+
+    assert trusted["status"]["datum"] == "2023-01-01T12:00:00Z"
+    assert trusted == validated
+
+
 def test_pydantic_bestand_to_db_reuses_existing_instance():
     bestaande_bestand = models.PlanBestand(
         id=5,
@@ -0,0 +1,162 @@
+import json
+
+import pytest
+
+from app.search import beheersplan_aggregations
+from app.search.mapping.plannen import beheersplannen_source
+from app.search.mapping.plannen import suggesties_query
+from app.search.memory import InMemorySearchEngine
+from app.search.memory import UnsupportedSearch
+
+PLANNEN = [
+    {
+        "id": 1,
+        "onderwerp": "Abdij van Park",
+        "datum_goedkeuring": "2020-05-01",
+        "plantype": "https://id.erfgoed.net/thesauri/plantypes/1",
+        "gemeenten": [{"naam": "Leuven", "niscode": 24062}],
+        "status": {"status": 75, "actief": True},
+        "geometrie": {"type": "Polygon", "coordinates": []},
+        "geometrie_vereenvoudigd": {"laag": {"type": "Polygon", "coordinates": []}},
+    },
+    {
+        "id": 2,
+        "onderwerp": "Begijnhof",
+        "datum_goedkeuring": "2021-01-01",
+        "plantype": "https://id.erfgoed.net/thesauri/plantypes/2",
+        "gemeenten": [{"naam": "Gent", "niscode": 44021}],
+        "status": {"status": 10, "actief": False},
+    },
+    {
+        "id": 3,
+        "onderwerp": "Zuidelijke abdijsite",
+        "datum_goedkeuring": "2020-09-01",
+        "plantype": "https://id.erfgoed.net/thesauri/plantypes/1",
+        "gemeenten": [{"naam": "Leuven", "niscode": 24062}],
+        "status": {"status": 75, "actief": True},
+    },
+]
+
+
+@pytest.fixture
+def engine():
+    engine = InMemorySearchEngine()
+    engine.bulk_add_to_index(PLANNEN)
+    return engine
+
+
+def ids(result):
+    return [hit["_source"]["id"] for hit in result["hits"]["hits"]]
+
+
+def test_filters_on_normalized_keywords_and_date_ranges(engine):
+    result = engine.search(
+        query={
+            "bool": {
+                "filter": [
+                    {"terms": {"gemeenten.naam.lower": ["leuven"]}},
+                    {"range": {"datum_goedkeuring": {"gte": "2020-06-01"}}},
+                ]
+            }
+        }
+    )
+
+    assert ids(result) == [3]
+    assert result["hits"]["total"] == {"value": 1, "relation": "eq"}
+
+
+def test_sorts_and_pages_on_the_index_sort_field(engine):
+    result = engine.search(
+        sort=[{"onderwerp.raw": {"order": "asc"}}], from_=1, size=1
+    )
+
+    assert ids(result) == [2]
+
+
+def test_simple_query_string_searches_the_copy_to_field(engine):
+    result = engine.search(
+        query={
+            "simple_query_string": {
+                "query": "leuven -park",
+                "fields": ["onderwerp^3", "zoektekst^1"],
+                "default_operator": "AND",
+            }
+        }
+    )
+
+    assert ids(result) == [3]
+
+
+def test_suggesties_match_word_prefixes(engine):
+    result = engine.search(query=suggesties_query("abd"), sort=["onderwerp.raw"])
+
+    assert ids(result) == [1, 3]
+
+
+def test_source_filtering_as_in_the_list(engine):
+    result = engine.search(
+        query={"ids": {"values": [1]}},
+        source=beheersplannen_source(["onderwerp", "geometrie"], "laag"),
+    )
+
+    assert result["hits"]["hits"][0]["_source"] == {
+        "id": 1,
+        "onderwerp": "Abdij van Park",
+        "geometrie_vereenvoudigd": {"laag": {"type": "Polygon", "coordinates": []}},
+    }
+
+
+def test_terms_and_date_histogram_aggregations(engine):
+    result = engine.search(size=0, aggregations=beheersplan_aggregations)
+
+    aggregations = result["aggregations"]
+    assert aggregations["gemeente"]["buckets"] == [
+        {"key": "Gent", "doc_count": 1},
+        {"key": "Leuven", "doc_count": 2},
+    ]
+    assert [
+        (bucket["key_as_string"], bucket["doc_count"])
+        for bucket in aggregations["jaar_goedkeuring"]["buckets"]
+    ] == [("2020", 2), ("2021", 1)]
+
+
+def test_total_is_capped_at_track_total_hits(engine):
+    result = engine.search(size=0, track_total_hits=2)
+
+    assert result["hits"]["total"] == {"value": 2, "relation": "gte"}
+
+
+def test_query_maps_a_page_like_search_engine(engine):
+    result = engine.query(
+        query_params={"per_pagina": 2, "pagina": 2},
+        sort=[{"id": {"order": "asc"}}],
+        mapper=lambda result, settings: ids(result),
+    )
+
+    assert result.data == [3]
+    assert result.count == 3
+
+
+def test_unsupported_queries_are_explicit(engine):
+    with pytest.raises(UnsupportedSearch, match="geo_shape query"):
+        engine.search(query={"geo_shape": {"geometrie": {}}})
+
+
+def test_unsupported_client_calls_are_explicit(engine):
+    with pytest.raises(UnsupportedSearch):
+        engine.get(index="plannen_zoekopdrachten", id="1")
+    with pytest.raises(UnsupportedSearch):
+        engine.open_point_in_time(index="plannen", keep_alive="1m")
+
+
+def test_load_ndjson_indexes_one_document_per_line(tmp_path):
+    bestand = tmp_path / "plannen.ndjson"
+    bestand.write_text(
+        "".join(json.dumps(plan) + "\n" for plan in PLANNEN) + "\n", encoding="utf-8"
+    )
+    engine = InMemorySearchEngine()
+
+    aantal = engine.load_ndjson(bestand)
+
+    assert aantal == len(PLANNEN)
+    assert engine.count(query={"match_all": {}}) == {"count": len(PLANNEN)}
@@ -0,0 +1,74 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.search.pagination import FIRST_CURSOR
+from app.search.pagination import InvalidCursor
+from app.search.pagination import decode_cursor
+from app.search.pagination import encode_cursor
+from app.search.pagination import query_hash
+from app.search.pagination import search_page
+
+MATCH_ALL = query_hash({"match_all": {}}, [])
+
+
+def es_result(pit_id, sorts):
+    return {
+        "pit_id": pit_id,
+        "hits": {
+            "hits": [{"_source": {"id": i}, "sort": s} for i, s in enumerate(sorts)]
+        },
+    }
+
+
+def test_cursor_round_trip():
+    token = encode_cursor("pit-1", ["b", 1.0, 42], MATCH_ALL)
+
+    assert decode_cursor(token) == ("pit-1", ["b", 1.0, 42], MATCH_ALL)
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("dit is geen cursor")
+
+
+def test_search_page_opens_pit_and_returns_next_cursor():
+    es = MagicMock()
+    es.open_point_in_time.return_value = {"id": "pit-1"}
+    es.search.return_value = es_result("pit-2", [["a", 1], ["b", 2]])
+
+    _, next_cursor = search_page(es, "plannen", {"match_all": {}}, [], 2, FIRST_CURSOR)
+
+    assert es.search.call_args.kwargs["pit"]["id"] == "pit-1"
+    assert es.search.call_args.kwargs["search_after"] is None
+    assert decode_cursor(next_cursor) == ("pit-2", ["b", 2], MATCH_ALL)
+    es.close_point_in_time.assert_not_called()
+
+
+def test_search_page_closes_pit_on_last_page():
+    es = MagicMock()
+    es.search.return_value = es_result("pit-2", [["c", 3]])
+
+    cursor = encode_cursor("pit-1", ["b", 2], MATCH_ALL)
+
+    _, next_cursor = search_page(es, "plannen", {"match_all": {}}, [], 2, cursor)
+
+    assert es.search.call_args.kwargs["search_after"] == ["b", 2]
+    assert next_cursor is None
+    es.close_point_in_time.assert_called_once_with(id="pit-2")
+
+
+def test_search_page_rejects_a_cursor_of_another_query():
+    es = MagicMock()
+    cursor = encode_cursor("pit-1", ["b", 2], MATCH_ALL)
+
+    with pytest.raises(InvalidCursor):
+        search_page(es, "plannen", {"term": {"id": 1}}, [], 2, cursor)
+
+    es.search.assert_not_called()
+
+
+def test_query_hash_ignores_key_order():
+    assert query_hash({"bool": {"must": [], "filter": []}}, []) == query_hash(
+        {"bool": {"filter": [], "must": []}}, []
+    )
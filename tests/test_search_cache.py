@@ -0,0 +1,23 @@
+from app.cache.search import SearchCache
+from app.cache.search import search_cache_key
+
+
+def test_search_cache_key_ignores_order_and_empty_params():
+    assert search_cache_key(
+        {"gemeente": ["Leuven", "Gent"], "provincie": None, "tekst": ""}
+    ) == search_cache_key({"gemeente": ["Gent", "Leuven"]})
+
+
+def test_search_cache_key_differs_per_filter():
+    assert search_cache_key({"gemeente": "Gent"}) != search_cache_key(
+        {"gemeente": "Leuven"}
+    )
+
+
+def test_search_cache_without_redis_stores_nothing():
+    cache = SearchCache(redis=None, namespace="facetten")
+    generation = cache.generation()
+    cache.set(generation, {"gemeente": "Gent"}, [{"naam": "gemeente"}])
+
+    assert generation is None
+    assert cache.get(generation, {"gemeente": "Gent"}) is None
@@ -0,0 +1,161 @@
+from types import SimpleNamespace
+
+from app.search.mapping.plannen import beheersplannen_create_body
+from app.search.mapping.plannen import beheersplannen_mapping
+from app.search.mapping.plannen import beheersplannen_source
+from app.search.mapping.plannen import map_es_beheersplannen_result
+from app.search.mapping.plannen import map_es_beheersplannen_sparse_result
+from app.search.mapping.plannen import map_es_clusters
+from app.search.mapping.plannen import map_es_suggesties
+from app.search.mapping.plannen import suggesties_query
+from app.search.mapping.plannen import uses_index_sort
+from app.search.mapping.plannen import velden_to_source
+
+
+def test_velden_to_source_always_includes_id():
+    assert velden_to_source(["onderwerp", "actief", "self"]) == [
+        "id",
+        "onderwerp",
+        "status.actief",
+    ]
+
+
+def test_sparse_result_only_contains_requested_velden():
+    result = {
+        "hits": {
+            "hits": [
+                {"_source": {"id": 3, "onderwerp": "Park", "status": {"actief": True}}}
+            ]
+        }
+    }
+    settings = SimpleNamespace(PLANNEN_URI="https://plannen.test/{id}")
+
+    plannen = map_es_beheersplannen_sparse_result(
+        "https://api.test/plannen/{id}", ["onderwerp", "actief"], result, settings
+    )
+
+    assert plannen == [{"id": 3, "onderwerp": "Park", "actief": True}]
+
+
+def test_source_only_fetches_geometrie_at_requested_detail():
+    assert beheersplannen_source() == {
+        "excludes": ["geometrie_bbox", "geometrie_centroid", "geometrie_vereenvoudigd"]
+    }
+    assert beheersplannen_source(geometrie_detail="laag") == {
+        "excludes": [
+            "geometrie_bbox",
+            "geometrie_centroid",
+            "geometrie",
+            "geometrie_vereenvoudigd.midden",
+        ]
+    }
+    assert beheersplannen_source(["geometrie"], "laag") == [
+        "geometrie_vereenvoudigd.laag",
+        "id",
+    ]
+
+
+def test_markers_are_fetched_without_the_full_geometrie():
+    source = beheersplannen_source(["onderwerp", "geometrie_centroid"])
+    assert source == ["geometrie_centroid", "id", "onderwerp"]
+
+    centroid = {"lat": 50.88, "lon": 4.7}
+    hit = {"_source": {"id": 3, "geometrie_centroid": centroid}}
+    result = {"hits": {"hits": [hit]}}
+    settings = SimpleNamespace(PLANNEN_URI="https://plannen.test/{id}")
+
+    plannen = map_es_beheersplannen_sparse_result(
+        "https://api.test/plannen/{id}", ["geometrie_centroid"], result, settings
+    )
+
+    assert plannen == [{"id": 3, "geometrie_centroid": centroid}]
+
+
+def test_result_uses_simplified_geometrie():
+    laag = {"type": "Polygon", "coordinates": [[[4.0, 51.0], [4.1, 51.1]]]}
+    result = {
+        "hits": {
+            "hits": [
+                {"_source": {"id": 1, "geometrie_vereenvoudigd": {"laag": laag}}},
+                {"_source": {"id": 2, "geometrie": {"type": "Polygon"}}},
+            ]
+        }
+    }
+    settings = SimpleNamespace(PLANNEN_URI="https://plannen.test/{id}")
+
+    plannen = map_es_beheersplannen_result(
+        "https://api.test/plannen/{id}", result, settings, geometrie_detail="laag"
+    )
+
+    assert plannen[0]["geometrie"] == laag
+    # not reindexed yet, falls back to the full geometrie
+    assert plannen[1]["geometrie"] == {"type": "Polygon"}
+
+
+def test_map_es_suggesties_returns_ids_and_onderwerpen():
+    result = {"hits": {"hits": [{"_source": {"id": 3, "onderwerp": "Abdij Park"}}]}}
+
+    assert map_es_suggesties("http://localhost/plannen/{id}", result) == [
+        {"id": 3, "onderwerp": "Abdij Park", "self": "http://localhost/plannen/3"}
+    ]
+
+
+def test_suggesties_query_matches_every_word_on_the_suggest_field():
+    assert suggesties_query("abdij pa") == {
+        "match": {"onderwerp.suggest": {"query": "abdij pa", "operator": "and"}}
+    }
+
+
+def test_uses_index_sort_only_for_the_default_sort():
+    assert uses_index_sort(None)
+    assert uses_index_sort("onderwerp.raw")
+    assert not uses_index_sort("-onderwerp.raw")
+    assert not uses_index_sort("onderwerp.raw,-datum_goedkeuring")
+
+
+def test_text_fields_are_copied_to_zoektekst():
+    properties = beheersplannen_mapping["properties"]
+
+    assert properties["zoektekst"]["type"] == "text"
+    for veld in (
+        properties["onderwerp"],
+        properties["plantype_naam"],
+        properties["gemeenten"]["properties"]["naam"],
+        properties["provincies"]["properties"]["naam"],
+        properties["aanduidingsobjecttypes"]["properties"]["naam"],
+    ):
+        assert veld["copy_to"] == "zoektekst"
+
+
+def test_map_es_clusters_returns_count_and_centroid_per_cell():
+    result = {
+        "aggregations": {
+            "clusters": {
+                "buckets": [
+                    {
+                        "key": "7/65/42",
+                        "doc_count": 12,
+                        "centroid": {
+                            "location": {"lat": 50.88, "lon": 4.7},
+                            "count": 12,
+                        },
+                    }
+                ]
+            }
+        }
+    }
+
+    assert map_es_clusters(result) == [
+        {"cel": "7/65/42", "aantal": 12, "centroid": {"lat": 50.88, "lon": 4.7}}
+    ]
+
+
+def test_index_is_created_with_its_sort_field_mapped():
+    body = beheersplannen_create_body()
+
+    assert body["settings"]["index"]["sort.field"] == "onderwerp.raw"
+    assert body["settings"]["index"]["sort.order"] == "asc"
+    assert body["mappings"]["properties"]["onderwerp"]["fields"]["raw"] == {
+        "type": "keyword",
+        "normalizer": "keyword_lowercase",
+    }
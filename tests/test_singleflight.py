@@ -0,0 +1,75 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.cache.singleflight import SingleFlight
+
+
+def _slow_call(calls):
+    def fn():
+        calls.append(1)
+        time.sleep(0.2)
+        return [{"id": 1}]
+
+    return fn
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    single_flight = SingleFlight()
+    calls = []
+    fn = _slow_call(calls)
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(lambda _: single_flight.do("zoek", fn), range(5)))
+
+    assert len(calls) == 1
+    assert results == [[{"id": 1}]] * 5
+
+
+def test_single_flight_does_not_share_between_keys():
+    single_flight = SingleFlight()
+    calls = []
+    fn = _slow_call(calls)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda key: single_flight.do(key, fn), ["a", "b"]))
+
+    assert len(calls) == 2
+
+
+def test_single_flight_shares_exceptions_and_forgets_the_call():
+    single_flight = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.2)
+        raise ValueError("ES is stuk")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(single_flight.do, "zoek", failing)
+        started.wait()
+        follower = pool.submit(single_flight.do, "zoek", lambda: "niet gebruikt")
+        with pytest.raises(ValueError):
+            leader.result()
+        with pytest.raises(ValueError):
+            follower.result()
+
+    assert single_flight.do("zoek", lambda: "opnieuw") == "opnieuw"
+
+
+def test_single_flight_waits_for_the_worker_holding_the_lock(fake_redis):
+    single_flight = SingleFlight(fake_redis, lock_timeout=2, poll_interval=0.01)
+    other_worker = fake_redis.lock("plannen:singleflight:zoek:lock", timeout=2)
+    other_worker.acquire()
+
+    def publish():
+        time.sleep(0.2)
+        fake_redis.set("plannen:singleflight:zoek:resultaat", '[{"id": 1}]', px=2000)
+        other_worker.release()
+
+    threading.Thread(target=publish).start()
+
+    assert single_flight.do("zoek", lambda: "niet gebruikt") == [{"id": 1}]
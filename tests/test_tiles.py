@@ -0,0 +1,83 @@
+from unittest.mock import MagicMock
+
+from app.cache.tiles import TileCache
+from app.cache.tiles import tiles_for_bounds
+
+LEUVEN = (4.69, 50.87, 4.71, 50.89)
+
+
+def test_tiles_for_bounds_at_zoom_0_is_the_world():
+    assert tiles_for_bounds(LEUVEN, 0) == (range(0, 1), range(0, 1))
+
+
+def test_tiles_for_bounds_of_leuven():
+    xs, ys = tiles_for_bounds(LEUVEN, 14)
+
+    assert list(xs) == [8405, 8406]
+    assert list(ys) == [5492, 5493, 5494]
+
+
+def test_tile_cache_invalidates_old_and_new_tiles():
+    redis = MagicMock()
+    redis.smembers.return_value = {b"plannen:tiles:3:1:1"}
+    cache = TileCache(redis, bounds_loader=lambda ids: [LEUVEN], max_zoom=2)
+
+    cache.invalidate({7})
+
+    deleted = set(redis.delete.call_args.args)
+    assert deleted == {
+        "plannen:tiles:3:1:1",
+        "plannen:tiles:0:0:0",
+        "plannen:tiles:1:1:0",
+        "plannen:tiles:2:2:1",
+        "plannen:tiles:plan:7",
+    }
+
+
+def test_tile_cache_flushes_zoom_levels_with_too_many_tiles():
+    redis = MagicMock()
+    redis.smembers.return_value = set()
+    redis.scan_iter.return_value = []
+    cache = TileCache(
+        redis,
+        bounds_loader=lambda ids: [LEUVEN],
+        max_zoom=14,
+        max_invalidation=2,
+    )
+
+    cache.invalidate({7})
+
+    redis.scan_iter.assert_called_with(match="plannen:tiles:14:*")
+
+
+def test_tile_cache_invalidation_bumps_the_generation():
+    redis = MagicMock()
+    redis.smembers.return_value = set()
+    cache = TileCache(redis, max_zoom=2)
+
+    cache.invalidate({7})
+
+    redis.incr.assert_called_once_with("plannen:tiles:generatie")
+
+
+def test_tile_cache_write_is_guarded_by_the_generation():
+    redis = MagicMock()
+    redis.get.return_value = b"3"
+    cache = TileCache(redis, max_zoom=2)
+
+    generation = cache.generation()
+    cache.set(1, 1, 0, b"tile", [7], generation)
+
+    cache._set_if_generation.assert_called_once_with(
+        keys=["plannen:tiles:generatie", "plannen:tiles:1:1:0", "plannen:tiles:plan:7"],
+        args=["3", b"tile", 86400],
+    )
+
+
+def test_tile_cache_skips_the_write_without_a_generation():
+    redis = MagicMock()
+    cache = TileCache(redis, max_zoom=2)
+
+    cache.set(1, 1, 0, b"tile", [7], None)
+
+    cache._set_if_generation.assert_not_called()
@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock
+
+from app.search.mapping.zoekopdrachten import zoekopdrachten_mapping
+from app.search.zoekopdrachten import get_treffers
+from app.search.zoekopdrachten import percoleer
+
+
+def test_percolator_index_knows_the_plan_fields():
+    properties = zoekopdrachten_mapping["properties"]
+
+    assert properties["query"] == {"type": "percolator"}
+    assert properties["gemeenten"]["properties"]["naam"]["fields"]["lower"]
+
+
+def test_percoleer_maps_document_slots_to_plan_ids():
+    es = MagicMock()
+    es.search.return_value = {
+        "hits": {
+            "total": {"value": 2, "relation": "eq"},
+            "hits": [
+                {"_id": "leuven", "fields": {"_percolator_document_slot": [0, 2]}},
+                {"_id": "gent", "fields": {"_percolator_document_slot": [1]}},
+            ],
+        }
+    }
+    plannen = [{"id": 7}, {"id": 8}, {"id": 9}]
+
+    assert percoleer(es, "plannen", plannen) == {"leuven": [7, 9], "gent": [8]}
+    kwargs = es.search.call_args.kwargs
+    assert kwargs["index"] == "plannen_zoekopdrachten"
+    assert kwargs["query"]["percolate"]["documents"] == plannen
+
+
+def test_percoleer_without_plannen_does_not_search():
+    es = MagicMock()
+
+    assert percoleer(es, "plannen", []) == {}
+    es.search.assert_not_called()
+
+
+def test_get_treffers_since_timestamp():
+    redis = MagicMock()
+    redis.zrangebyscore.return_value = [("7", 1700000000.0), ("9", 1700000060.0)]
+
+    treffers = get_treffers(redis, "leuven", sinds=1700000000.0)
+
+    assert treffers == [(7, 1700000000.0), (9, 1700000060.0)]
+    redis.zrangebyscore.assert_called_once_with(
+        "plannen:zoekopdrachten:leuven:treffers",
+        1700000000.0,
+        "+inf",
+        withscores=True,
+    )